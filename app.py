@@ -1,15 +1,24 @@
 import os
+import threading
 import pandas as pd
 import numpy as np
 import dash
-from dash import dcc, html, dash_table, Dash, Input, Output, State, callback_context
+from dash import dcc, html, dash_table, Dash, Input, Output, State, callback_context, no_update
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
-import dash_leaflet as dl
-import plotly.express as px
 import plotly.graph_objects as go
 from dotenv import load_dotenv, find_dotenv, dotenv_values
-from config import load_survey_data, load_model_data
+from config import load_survey_data, load_model_data, PIVOT_DIMENSIONS
+from model_plugins import get_model, model_files
+from survey_ci import bootstrap_share_ci, cached_share_ci, survey_version, CI_REPLICATES, CI_LEVEL
+from calibration import constant_suggestions, invalidate_suggestions
+from export import EXPORT_FORMATS, iter_tables, stream_export, export_filename
+from figures import empty_fig, bar_categories, bar_figure, bar_patch
+from pivot import pivot_tables, category_sort_key
+from summaries import general_tour_type, prepare_santrips, process_santrips, merge_summarized_trip_data
+from catalog import scan_scenarios, id_collisions, scenario_labels, normalize_path, file_fingerprint
+from flask import Response, request, stream_with_context
+from urllib.parse import urlencode
 
 
 # === Detect App environment and read environment variables ===
@@ -22,21 +31,27 @@ if dotenv_path:
     load_dotenv(dotenv_path, override=False)
     user = os.getenv("USER_AGENT_ENTRY")
 env = os.getenv("ENV")
+selected_model = os.getenv("SELECTED_MODEL", "airport.SAN")
+survey = os.getenv("SURVEY_PATH")
+model_plugin = get_model(selected_model)
 
 if env == "Azure":
     pass
 elif env == "Local":
     scenario_list_str = os.getenv("SCENARIO_LIST")
-    survey = os.getenv("SURVEY_PATH")
-    selected_model = os.getenv("SELECTED_MODEL")
+    scenario_roots_str = os.getenv("SCENARIO_ROOTS")
 else:
     raise ValueError("Environment variable 'ENV' must be set to either 'Azure' or 'Local'.")
 print(f"Running in environment: {env}")
 
+# survey bootstrap settings
+ci_replicates = int(os.getenv("SURVEY_CI_REPLICATES", CI_REPLICATES))
+ci_level = float(os.getenv("SURVEY_CI_LEVEL", CI_LEVEL))
+
 
 # === Load survey and model data ===
 # load survey data from Databricks
-survey_data = load_survey_data(user)
+survey_data = load_survey_data(user, model_plugin, survey)
 
 # load model data from input environment
 if env == "Azure":
@@ -47,110 +62,65 @@ else:
     scenario_dict = {path : {} for path in scenario_list}
     model_data = load_model_data(scenario_dict, selected_model, env, user)
 
+    # Scenario catalog: scenarios in SCENARIO_LIST are loaded above; scenarios found under SCENARIO_ROOTS
+    # are listed from the catalog index and only loaded when first selected
+    catalog_entries = [dict(data['metadata'], path=normalize_path(path)) for path, data in model_data.items()]
+    scenario_roots = scenario_roots_str.split(",") if scenario_roots_str else []
+    if scenario_roots:
+        loaded_paths = {e['path'] for e in catalog_entries}
+        catalog_entries += [e for e in scan_scenarios(scenario_roots, model_files(model_plugin)) if e['path'] not in loaded_paths]
+
+    for scenario_id, paths in id_collisions(catalog_entries).items():
+        print(f"⚠️ scenario_id {scenario_id} is shared by {len(paths)} scenarios: {', '.join(paths)}")
+    scenario_label_by_path = scenario_labels(catalog_entries)
+    catalog_by_label = {scenario_label_by_path[e['path']]: e for e in catalog_entries}
+
 
 # === Process airport trip mode choice and destination choice data ===
-def process_santrips(trip_data, aggregator, emp):
-    # ignore employee trips if emp is set to False
-    if emp == False:
-        trip_data = trip_data.query("tour_type != 'emp'").copy()
-    # include ONLY employee trips if emp is set to True
-    else:
-        trip_data = trip_data.query("tour_type == 'emp'").copy()
-
-    # map model and survey arrival mode to WSP mode split
-    arrival_mode_to_wsp = {
-            "drop_off": "Drop-off/Pick up",
-            "shuttle": "Shared Shuttle Van",
-            "public_transit": "Public Transportation",
-            "park_escort": "Drop-off/Pick up",
-            "parked_on_site":"Personal Car Parked",
-            "parked_off_site":"Personal Car Parked",
-            'parked_employee':"Personal Car Parked",
-            'parked_unknown':"Personal Car Parked",
-            "rental_car":"Rental Car",
-            "tnc":"UBER/Lyft",
-            "taxi":"Taxi",
-            "active_transportation":"Walk"
-    }
-    trip_data['arrival_mode'] = trip_data['arrival_mode'].replace(arrival_mode_to_wsp)
+# map model and survey arrival mode to the chart labels of the selected model (WSP mode split for the airport models)
+ARRIVAL_MODE_TO_WSP = model_plugin["mode_labels"]
 
-    # rename columns for clarity
-    trip_data = trip_data.rename(columns={'weight_person_trip': 'trip'})
 
+# === Survey sampling error ===
+def survey_share_ci(trip_data, aggregator, emp, version):
     """
-    Group the trip data by the specified aggregator (e.g., arrival_mode) and tour type
+    Bootstrap intervals of survey shares by aggregator for each tour type, general tour type and Total.
+    Returns the interval tables for the disaggregated and the general summaries (disaggregated only for employees).
     """
-    # group by user-input aggregator (e.g., arrival_mode) and tour type and calculate percentage of trips by tour type
-    trip_by_mode = trip_data.groupby([aggregator,'tour_type'])['trip'].sum().reset_index()
-    trip_by_mode['trip_pct'] = trip_by_mode['trip'] / trip_by_mode.groupby('tour_type')['trip'].transform('sum') * 100
-
-    # create total row from trip_by_mode and calculate percentage of trips
-    trip_mode_totals = trip_by_mode.groupby(aggregator)['trip'].sum().reset_index()
-    trip_mode_totals['tour_type'] = 'Total'
-    trip_mode_totals['trip_pct'] = trip_mode_totals['trip'] / trip_mode_totals['trip'].sum() * 100
-
-    if emp == False:
-        # concatenate the total row to the trip_by_mode DataFrame
-        trip_by_dTour_aggMode = pd.concat([trip_by_mode, trip_mode_totals], ignore_index=True)
-    else:
-        trip_by_dTour_aggMode = trip_by_mode.copy()
-
-    # create a new column for the general tour type
-    trip_by_dTour_aggMode['tour_type_general'] = trip_by_dTour_aggMode['tour_type'].apply(
-    lambda x: 'resident' if str(x).startswith('res_') else
-              'visitor' if str(x).startswith('vis_') else
-              'employee' if str(x).startswith('emp') else
-              'Total' if str(x) == 'Total' else
-              x
-    )
-
-    # Ensure all modes in unique_modes are present in merged_df for each tour_type
-    if aggregator == 'arrival_mode':
-        unique_modes = list(set(arrival_mode_to_wsp.values()))
-    elif aggregator == 'origin_pmsa':
-        unique_modes = list(trip_data['origin_pmsa'].unique())
-    all_tour_types = trip_by_dTour_aggMode['tour_type'].unique()
-    rows_to_add = []
-
-    for tour_type in all_tour_types:
-        existing_modes = set(trip_by_dTour_aggMode.loc[trip_by_dTour_aggMode['tour_type'] == tour_type, aggregator])
-        missing_modes = set(unique_modes) - existing_modes
-        for mode in missing_modes:
-            # Find the general tour type for this tour_type
-            general_type = trip_by_dTour_aggMode.loc[trip_by_dTour_aggMode['tour_type'] == tour_type, 'tour_type_general'].iloc[0]
-            rows_to_add.append({
-                aggregator: mode,
-                'tour_type': tour_type,
-                'trip': 0.0,
-                'trip_pct': 0.0,
-                'tour_type_general': general_type
-            })
-    trip_by_dTour_aggMode = pd.concat([trip_by_dTour_aggMode, pd.DataFrame(rows_to_add)], ignore_index=True)
-    
-    if emp == False:
-        # calculate total trip by general tour type and by arrival mode
-        trip_by_geTour_aggMode = trip_by_dTour_aggMode.query("tour_type_general != 'Total'").copy()
-        trip_by_geTour_aggMode = trip_by_geTour_aggMode.groupby(['tour_type_general', aggregator])['trip'].sum().reset_index()
-        
-        # calculate trip percentage by general tour type and by arrival mode
-        total_trips_by_geTour = trip_by_geTour_aggMode.groupby(['tour_type_general'])['trip'].sum().reset_index()
-        trip_by_geTour_aggMode = trip_by_geTour_aggMode.merge(total_trips_by_geTour, on='tour_type_general', suffixes=('_by_mode', '_total'))
-        trip_by_geTour_aggMode['trip_pct'] = trip_by_geTour_aggMode['trip_by_mode'] / trip_by_geTour_aggMode['trip_total'] * 100
-
-        # combine trips of all general tour types and calculate overall total
-        trip_geMode_totals = trip_by_dTour_aggMode.query("tour_type == 'Total'").copy()
-        trip_geMode_totals = trip_geMode_totals.rename(columns={'trip': 'trip_by_mode'}).drop(['tour_type'], axis=1)
-        trip_geMode_totals['trip_total'] = trip_geMode_totals['trip_by_mode'].sum()
-        trip_by_geTour_aggMode = pd.concat([trip_by_geTour_aggMode, trip_geMode_totals], ignore_index=True)
-        
-        return trip_by_dTour_aggMode, trip_by_geTour_aggMode
-    else:
-        return trip_by_dTour_aggMode
-
-    
-
-def merge_summarized_trip_data(model, survey, aggregator):
-    return model.merge(survey, on=aggregator, how='right', suffixes=('_model', '_survey'))
+    records = prepare_santrips(trip_data, emp, ARRIVAL_MODE_TO_WSP)
+    records['tour_type_general'] = records['tour_type'].apply(general_tour_type)
+    records['total'] = 'Total'
+
+    group_cols = ['tour_type'] if emp else ['tour_type', 'tour_type_general', 'total']
+    key = f"{aggregator}_{'emp' if emp else 'all'}_{ci_replicates}_{ci_level}"
+    ci = cached_share_ci(version, key, lambda: bootstrap_share_ci(records, aggregator, group_cols,
+                                                                  n_reps=ci_replicates, level=ci_level))
+    if emp:
+        return ci
+
+    # general_tour_type may return a tour type unchanged, so rows are split by the group column that made them
+    tour_ci = ci[ci['level'].isin(['tour_type', 'total'])]
+    general_ci = ci[ci['level'].isin(['tour_type_general', 'total'])]
+    return tour_ci, general_ci
+
+def segment_share_ci(trip_data, version):
+    # intervals of each general tour type's share of all (non-employee) survey trips, shown on the summary card
+    records = prepare_santrips(trip_data, False, ARRIVAL_MODE_TO_WSP)
+    records['tour_type_general'] = records['tour_type'].apply(general_tour_type)
+    records['total'] = 'Total'
+
+    key = f"segment_{ci_replicates}_{ci_level}"
+    ci = cached_share_ci(version, key, lambda: bootstrap_share_ci(records, 'tour_type_general', ['total'],
+                                                                  n_reps=ci_replicates, level=ci_level))
+    return ci.drop(columns=['level', 'segment'])
+
+def attach_survey_ci(summary, ci, segment_col, aggregator):
+    # cells absent from the survey have a share of zero in every replicate
+    ci = ci.drop(columns='level').rename(columns={'segment': segment_col})
+    summary = summary.merge(ci, on=[segment_col, aggregator], how='left')
+    summary['trip_pct_survey_lo'] = summary['trip_pct_survey_lo'].fillna(summary['trip_pct'])
+    summary['trip_pct_survey_hi'] = summary['trip_pct_survey_hi'].fillna(summary['trip_pct'])
+    return summary
 
 
 # Define result dictionary, aggregation, and employee trip inclusion
@@ -161,24 +131,84 @@ emp = False  # Set to True to include employee trips
 
 # Process survey data
 # load trip by arrival mode and by tour type (i.e., market segment)
-survey_arrival, ge_survey_arrival = process_santrips(survey_data["santrips"], aggregator, emp)
-survey_emp_arrival = process_santrips(survey_data["santrips"], aggregator, True)
+survey_arrival, ge_survey_arrival = process_santrips(survey_data["santrips"], aggregator, emp, ARRIVAL_MODE_TO_WSP)
+survey_emp_arrival = process_santrips(survey_data["santrips"], aggregator, True, ARRIVAL_MODE_TO_WSP)
 
 # load trip by origin psma and by tour type (i.e., market segment)
-survey_pmsa, ge_survey_pmsa = process_santrips(survey_data["santrips"], aggregator2, emp)
-survey_emp_pmsa = process_santrips(survey_data["santrips"], aggregator2, True)
+survey_pmsa, ge_survey_pmsa = process_santrips(survey_data["santrips"], aggregator2, emp, ARRIVAL_MODE_TO_WSP)
+survey_emp_pmsa = process_santrips(survey_data["santrips"], aggregator2, True, ARRIVAL_MODE_TO_WSP)
+
+# attach bootstrap confidence intervals of the survey shares, cached per survey version
+survey_ver = survey_version(survey_data["santrips"])
+tour_ci, general_ci = survey_share_ci(survey_data["santrips"], aggregator, emp, survey_ver)
+emp_ci = survey_share_ci(survey_data["santrips"], aggregator, True, survey_ver)
+survey_arrival = attach_survey_ci(survey_arrival, tour_ci, 'tour_type', aggregator)
+ge_survey_arrival = attach_survey_ci(ge_survey_arrival, general_ci, 'tour_type_general', aggregator)
+survey_emp_arrival = attach_survey_ci(survey_emp_arrival, emp_ci, 'tour_type', aggregator)
+
+tour_ci2, general_ci2 = survey_share_ci(survey_data["santrips"], aggregator2, emp, survey_ver)
+emp_ci2 = survey_share_ci(survey_data["santrips"], aggregator2, True, survey_ver)
+survey_pmsa = attach_survey_ci(survey_pmsa, tour_ci2, 'tour_type', aggregator2)
+ge_survey_pmsa = attach_survey_ci(ge_survey_pmsa, general_ci2, 'tour_type_general', aggregator2)
+survey_emp_pmsa = attach_survey_ci(survey_emp_pmsa, emp_ci2, 'tour_type', aggregator2)
+
+survey_segment_ci = segment_share_ci(survey_data["santrips"], survey_ver)
+
+# Pivot dimensions shown in the app: those whose column is in the loaded model trips. A dimension without
+# a survey column (or whose survey column the survey lacks) is shown for the model only, survey_col None.
+ACTIVE_DIMENSIONS = {}
+for name, cfg in PIVOT_DIMENSIONS.items():
+    if not any(cfg['model_col'] in data["santrips"] for data in model_data.values()):
+        print(f"⚠️ Pivot dimension {name} skipped: model trips have no column {cfg['model_col']}")
+        continue
+    if cfg['survey_col'] is not None and cfg['survey_col'] not in survey_data["santrips"]:
+        print(f"⚠️ Pivot dimension {name} shown for the model only: survey data has no column {cfg['survey_col']}")
+        cfg = dict(cfg, survey_col=None)
+    ACTIVE_DIMENSIONS[name] = cfg
+
+# Chart modes: the two fixed choices plus one per active pivot dimension
+MODES = ["trip", "dest"] + list(ACTIVE_DIMENSIONS)
+
+def dimension_categories(model_trips, cfg):
+    # union of the values seen in the model and the survey, so every scenario lines up with the survey
+    values = set(model_trips[cfg['model_col']].dropna().unique().tolist())
+    if cfg['survey_col'] is not None:
+        values.update(survey_data["santrips"][cfg['survey_col']].dropna().unique().tolist())
+    return sorted(values, key=category_sort_key)
+
+def summarize_dimension(model_trips, name, cfg):
+    """
+    Merged model and survey tables of one pivot dimension, keyed merge_df_<name>, merge_df_general_<name>,
+    merge_df_emp_<name>. Without a survey column the survey side is empty (NaN trips, no intervals).
+    """
+    categories = dimension_categories(model_trips, cfg)
+    model_tables = pivot_tables(model_trips, cfg['model_col'], name, categories, general_tour_type)
+    survey_tables = pivot_tables(survey_data["santrips"], cfg['survey_col'], name, categories, general_tour_type)
+
+    if cfg['survey_col'] is not None:
+        survey_trips = survey_data["santrips"].dropna(subset=[cfg['survey_col']]).rename(columns={cfg['survey_col']: name})
+        dim_tour_ci, dim_general_ci = survey_share_ci(survey_trips, name, False, survey_ver)
+        dim_emp_ci = survey_share_ci(survey_trips, name, True, survey_ver)
+        survey_tables = (attach_survey_ci(survey_tables[0], dim_tour_ci, 'tour_type', name),
+                         attach_survey_ci(survey_tables[1], dim_general_ci, 'tour_type_general', name),
+                         attach_survey_ci(survey_tables[2], dim_emp_ci, 'tour_type', name))
+
+    return {
+        f"merge_df_{name}": merge_summarized_trip_data(model_tables[0], survey_tables[0], ['tour_type', name]),
+        f"merge_df_general_{name}": merge_summarized_trip_data(model_tables[1], survey_tables[1], ['tour_type_general', name]),
+        f"merge_df_emp_{name}": merge_summarized_trip_data(model_tables[2], survey_tables[2], ['tour_type', name]),
+    }
 
 # Process model data and merge with survey data
-for path, data in model_data.items():
-    # get scenario name and id
-    scenario_name = str(data['metadata']['scenario_id']) + ': ' + data['metadata']['scenario_name']
+def summarize_scenario(data):
+    """Merged model and survey summary tables of one scenario."""
 
     """
     Trip mode choice: process airport trip mode choice by arrival mode and by tour type
     """
     # load trip by arrival mode and by tour type (i.e., market segment)
-    model_arrival, ge_model_arrival = process_santrips(data["santrips"], aggregator, emp)
-    model_emp_arrival = process_santrips(data["santrips"], aggregator, True)
+    model_arrival, ge_model_arrival = process_santrips(data["santrips"], aggregator, emp, ARRIVAL_MODE_TO_WSP)
+    model_emp_arrival = process_santrips(data["santrips"], aggregator, True, ARRIVAL_MODE_TO_WSP)
 
     # get merged DataFrames for trip w/wo employee trips by arrival mode and by tour type (i.e., market segment)
     merge_df = merge_summarized_trip_data(model_arrival, survey_arrival, ['tour_type', aggregator])
@@ -190,17 +220,16 @@ for path, data in model_data.items():
     Destination mode choice: process airport trip mode choice by pmsa and by tour type
     """
     # load trip by origin pmsa and by tour type (i.e., market segment)
-    model_pmsa, ge_model_pmsa = process_santrips(data["santrips"], aggregator2, emp)
-    model_emp_pmsa = process_santrips(data["santrips"], aggregator2, True)
+    model_pmsa, ge_model_pmsa = process_santrips(data["santrips"], aggregator2, emp, ARRIVAL_MODE_TO_WSP)
+    model_emp_pmsa = process_santrips(data["santrips"], aggregator2, True, ARRIVAL_MODE_TO_WSP)
 
     # get merged DataFrames for trip w/wo employee trips by pmsa and by tour type (i.e., market segment)
     merge_df2 = merge_summarized_trip_data(model_pmsa, survey_pmsa, ['tour_type', aggregator2])
     merge_df_general2 = merge_summarized_trip_data(ge_model_pmsa, ge_survey_pmsa, ['tour_type_general', aggregator2])
     merge_df_emp2 = merge_summarized_trip_data(model_emp_pmsa, survey_emp_pmsa, ['tour_type', aggregator2])
 
-    # store merged DataFrames in the dictionary
-    santrips_dict[scenario_name] = {
-        "model": "airport.SAN",
+    tables = {
+        "model": selected_model,
         "merge_df": merge_df,
         "merge_df_general": merge_df_general,
         "merge_df_emp": merge_df_emp,
@@ -209,6 +238,26 @@ for path, data in model_data.items():
         "merge_df_emp2": merge_df_emp2
     }
 
+    """
+    Additional trip attributes: one pass of the pivot engine per active dimension the scenario's trips carry
+    """
+    for name, cfg in ACTIVE_DIMENSIONS.items():
+        if cfg['model_col'] in data["santrips"]:
+            tables.update(summarize_dimension(data["santrips"], name, cfg))
+    return tables
+
+
+# fingerprint of each loaded scenario's metadata and model files, to reload scenarios changed on disk
+loaded_fingerprints = {}
+
+for path, data in model_data.items():
+    # get scenario name and id (made unique where scenario ids collide)
+    scenario_name = scenario_label_by_path[normalize_path(path)]
+
+    # store merged DataFrames in the dictionary
+    santrips_dict[scenario_name] = summarize_scenario(data)
+    loaded_fingerprints[scenario_name] = file_fingerprint(path, model_files(model_plugin))
+
     
 # === Establish Dash App ===
 # Ensure necessary data exist
@@ -217,15 +266,18 @@ try:
 except NameError:
     print("santrips_dict not found")
 
-# Scenario list for the navbar dropdown
-scenarios = sorted(santrips_dict.keys())
-default_scenario = scenarios[0] if scenarios else None
+# Scenario list for the navbar dropdown: every catalog scenario, searchable by id, name, year and folder
+scenarios = sorted(catalog_by_label)
+scenario_options = [
+    {'label': s, 'value': s, 'title': catalog_by_label[s]['path'],
+     'search': f"{s} {catalog_by_label[s]['scenario_yr']} {catalog_by_label[s]['path']}"}
+    for s in scenarios
+]
+loaded_scenarios = sorted(santrips_dict.keys())
+default_scenario = loaded_scenarios[0] if loaded_scenarios else None
 
 # Global variables
-X_ORDER = [
-    'Drop-off/Pick up', 'UBER/Lyft', 'Taxi', 'Personal Car Parked',
-    'Shared Shuttle Van', 'Rental Car', 'Walk', 'Public Transportation'
-]
+X_ORDER = model_plugin["mode_order"]
 DEFAULT_MODE = "trip"  # or "dest"
 
 # --- App ---
@@ -251,9 +303,11 @@ def get_navbar():
                     html.Label("Scenario", style={'color': 'white', 'marginRight': '8px'}),
                     dcc.Dropdown(
                         id='scenario-dd',
-                        options=[{'label': s, 'value': s} for s in scenarios],
+                        options=scenario_options,
                         value=default_scenario,
                         clearable=False,
+                        searchable=True,
+                        placeholder="Search scenarios...",
                         persistence=True,
                         style={'width': '280px'}
                     )
@@ -266,6 +320,7 @@ def get_navbar():
                     dcc.Link(dbc.Button("Aggregated Tour Type", id="btn-home", outline=True, size="sm", style={'color': 'white'}), href="/"),
                     dcc.Link(dbc.Button("Disaggregated Tour Type", id="btn-tour", outline=True, size="sm", style={'color': 'white'}), href="/tour-type-page"),
                     dcc.Link(dbc.Button("Employee Trips", id="btn-emp", outline=True, size="sm", style={'color': 'white'}), href="/employee-tour-type-page"),
+                    dcc.Link(dbc.Button("Calibration Constants", id="btn-const", outline=True, size="sm", style={'color': 'white'}), href="/constants-page"),
                 ]
             ),
         ],
@@ -280,7 +335,21 @@ sidebar = dbc.Offcanvas(
         html.H5(selected_model, className="mb-3"),
         dbc.Button("Trip Mode Choice", id="btn-mode-trip", color="primary", outline=False, className="mb-2", n_clicks=0, style={"width":"100%"}),
         dbc.Button("Destination Choice", id="btn-mode-dest", color="secondary", outline=True, className="mb-2", n_clicks=0, style={"width":"100%"}),
-        html.Hr()
+        *[dbc.Button(cfg["label"] if cfg["survey_col"] else f"{cfg['label']} (model only)", id=f"btn-mode-{name}", color="secondary", outline=True, className="mb-2", n_clicks=0, style={"width":"100%"})
+          for name, cfg in ACTIVE_DIMENSIONS.items()],
+        html.Hr(),
+        html.H6("Export Summary Tables", className="mb-2"),
+        dcc.Dropdown(id='export-scenarios', options=scenario_options,
+                     value=[default_scenario] if default_scenario else [], multi=True,
+                     placeholder="Scenarios", className="mb-2"),
+        dcc.Dropdown(id='export-format',
+                     options=[{'label': 'CSV (zip)', 'value': 'csv'},
+                              {'label': 'Parquet (zip)', 'value': 'parquet'},
+                              {'label': 'Arrow IPC (zip)', 'value': 'arrow'},
+                              {'label': 'Excel workbook (sent when complete)', 'value': 'xlsx'}],
+                     value='csv', clearable=False, className="mb-2"),
+        html.A(dbc.Button("Download", color="primary", style={"width":"100%"}),
+               id="export-link", href="/export", target="_blank"),
     ],
     id="sidebar-panel",
     title="Choose Metric",
@@ -290,15 +359,18 @@ sidebar = dbc.Offcanvas(
 
 
 # --- Summary Card ---
-def generate_summary_card(df: pd.DataFrame):
+def generate_summary_card(df: pd.DataFrame, survey_ci: pd.DataFrame = None):
     if df is None or df.empty:
         return dbc.Alert("No data for this scenario.", color="warning", className="mt-2")
 
     # Aggregate and compute percentages robustly
     df_no_total = df.query("tour_type_general != 'Total'").copy()
-    tbl = df_no_total.groupby('tour_type_general')[['trip_by_mode_model', 'trip_by_mode_survey']].sum().reset_index()
+    # survey trips stay NaN where the survey has no value, so a missing survey side shows blank rather than 0
+    grouped = df_no_total.groupby('tour_type_general')
+    tbl = pd.DataFrame({'trip_by_mode_model': grouped['trip_by_mode_model'].sum(),
+                        'trip_by_mode_survey': grouped['trip_by_mode_survey'].sum(min_count=1)}).reset_index()
     tot_model = float(tbl['trip_by_mode_model'].sum())
-    tot_survey = float(tbl['trip_by_mode_survey'].sum())
+    tot_survey = float(tbl['trip_by_mode_survey'].sum(min_count=1))
     tbl['trip_pct_model'] = (tbl['trip_by_mode_model'] / (tot_model if tot_model else 1.0)) * 100.0
     tbl['trip_pct_survey'] = (tbl['trip_by_mode_survey'] / (tot_survey if tot_survey else 1.0)) * 100.0
 
@@ -306,12 +378,18 @@ def generate_summary_card(df: pd.DataFrame):
     total_row = {
         'tour_type_general': 'Total',
         'trip_by_mode_model': tbl['trip_by_mode_model'].sum(),
-        'trip_by_mode_survey': tbl['trip_by_mode_survey'].sum(),
+        'trip_by_mode_survey': tbl['trip_by_mode_survey'].sum(min_count=1),
         'trip_pct_model': tbl['trip_pct_model'].sum(),
-        'trip_pct_survey': tbl['trip_pct_survey'].sum()
+        'trip_pct_survey': tbl['trip_pct_survey'].sum(min_count=1)
     }
     tbl = pd.concat([tbl, pd.DataFrame([total_row])], ignore_index=True)
 
+    # survey confidence interval per general tour type (blank for the total row)
+    if survey_ci is not None:
+        tbl = tbl.merge(survey_ci, on='tour_type_general', how='left')
+        tbl.loc[tbl['trip_by_mode_survey'].isna(), ['trip_pct_survey_lo', 'trip_pct_survey_hi']] = np.nan
+    ci_label = f"Survey Trip % {ci_level:.0%} CI"
+
     cell_style = {"padding": "8px 20px", "minWidth": "120px", "textAlign": "right", 'border': '1px solid black'}
 
     rows = []
@@ -320,9 +398,11 @@ def generate_summary_card(df: pd.DataFrame):
             html.Tr(
                 [
                     html.Td(row['tour_type_general'], style=cell_style),
-                    html.Td(f"{row['trip_by_mode_survey']:.1f}", style=cell_style),
+                    html.Td(f"{row['trip_by_mode_survey']:.1f}" if pd.notna(row['trip_by_mode_survey']) else "", style=cell_style),
                     html.Td(f"{row['trip_by_mode_model']:.1f}", style=cell_style),
-                    html.Td(f"{row['trip_pct_survey']:.2f}%", style=cell_style),
+                    html.Td(f"{row['trip_pct_survey']:.2f}%" if pd.notna(row['trip_pct_survey']) else "", style=cell_style),
+                    html.Td(f"{row['trip_pct_survey_lo']:.2f}% – {row['trip_pct_survey_hi']:.2f}%"
+                            if pd.notna(row.get('trip_pct_survey_lo')) else "", style=cell_style),
                     html.Td(f"{row['trip_pct_model']:.2f}%", style=cell_style),
                 ]
             )
@@ -337,6 +417,7 @@ def generate_summary_card(df: pd.DataFrame):
                         html.Th("Survey Weighted Trips", style=cell_style),
                         html.Th("Model Weighted Trips", style=cell_style),
                         html.Th("Survey Trip %", style=cell_style),
+                        html.Th(ci_label, style=cell_style),
                         html.Th("Model Trip %", style=cell_style),
                     ]
                 )
@@ -347,11 +428,13 @@ def generate_summary_card(df: pd.DataFrame):
         style={'border': '1px solid black', 'borderCollapse': 'collapse'}
     )
 
-    note = html.P("Only weighted person trips are included in this visualizer", style={"marginTop": "10px", "fontStyle": "italic"})
+    note = html.P("Only weighted person trips are included in this visualizer. "
+                  f"Survey intervals are weighted bootstrap percentiles over {ci_replicates} replicates.",
+                  style={"marginTop": "10px", "fontStyle": "italic"})
 
     return dbc.Card(
         [
-            dbc.CardHeader("Trip Summary by Departing Air Passenger Market", style={"fontWeight": "bold"}),
+            dbc.CardHeader(model_plugin["summary_title"], style={"fontWeight": "bold"}),
             dbc.CardBody(
                 [
                     table,
@@ -363,53 +446,85 @@ def generate_summary_card(df: pd.DataFrame):
     )
 
 # --- Pages ---
-summary_layout = html.Div(
-    [
-        html.Div(
-            [
-                html.H3(id="summary-model-title", style={"display": "inline-block"}),
-                html.Div(id="summary-card", style={"marginBottom": "20px"}),
-
-                html.Label("Select Aggregated Tour Type:"),
-                dcc.Dropdown(id='general-tour-type-dropdown', options=[], value=None, clearable=False,
-                             style={'width': '300px', 'margin-bottom': '20px'}),
+# Chart pages share one layout and one controller callback; these settings are what differs between them
+CHART_PAGES = {
+    "/": {
+        "page": "general", "key_index": 1, "segment_col": "tour_type_general",
+        "segment_label": "Select Aggregated Tour Type:", "card": True, "default_total": True,
+        "weighted_vars": ["trip_by_mode_survey", "trip_by_mode_model"],
+        "weighted_label": "Person Trips", "pct_label": "Percentage of Trips", "title_segment": "{}",
+    },
+    "/tour-type-page": {
+        "page": "tour", "key_index": 0, "segment_col": "tour_type",
+        "segment_label": "Select Disaggregated Tour Type:", "card": False, "default_total": True,
+        "weighted_vars": ["trip_survey", "trip_model"],
+        "weighted_label": "Weighted Person Trips", "pct_label": "Percentage of Weighted Person Trips", "title_segment": "{}",
+    },
+    "/employee-tour-type-page": {
+        "page": "emp", "key_index": 2, "segment_col": "tour_type",
+        "segment_label": "Employee Trips by Tour Type:", "card": False, "default_total": False,
+        "weighted_vars": ["trip_survey", "trip_model"],
+        "weighted_label": "Weighted Person Trips", "pct_label": "Percentage of Weighted Person Trips", "title_segment": "Employee - {}",
+    },
+}
+
+def chart_page_layout(pathname):
+    page = CHART_PAGES[pathname]
+    return html.Div(
+        [
+            html.Div(
+                [
+                    html.H3(id="page-title", style={"display": "inline-block"}),
+                    html.Div(id="summary-card", style={"marginBottom": "20px"} if page["card"] else {}),
 
-                html.Button("Show Weighted Person Trips", id='toggle-btn', n_clicks=0, style={'margin-bottom': '20px'}),
-                dcc.Graph(id='general-bar-chart')
-            ],
-            style={'padding': '20px'}
-        )
-    ]
-)
+                    html.Label(page["segment_label"]),
+                    dcc.Dropdown(id='segment-dropdown', options=[], value=None, clearable=False,
+                                 style={'width': '300px', 'margin-bottom': '20px'}),
 
-tour_type_layout = html.Div(
-    [
-        html.Div(
-            [
-                html.H3(id="tour-model-title", style={"display": "inline-block"}),
-                html.Br(),
-                html.Label("Select Disaggregated Tour Type:"),
-                dcc.Dropdown(id='tour-type-dropdown', options=[], value=None, clearable=False,
-                             style={'width': '300px', 'margin-bottom': '20px'}),
-                html.Button("Show Weighted Person Trips", id='toggle-btn-tour', n_clicks=0, style={'margin-bottom': '20px'}),
-                dcc.Graph(id='bar-chart')
-            ],
-            style={'padding': '20px'}
-        )
-    ]
-)
+                    html.Button("Show Weighted Person Trips", id='toggle-btn', n_clicks=0, style={'margin-bottom': '20px'}),
+                    dcc.Graph(id='bar-chart'),
+                    dcc.Store(id='bar-key')
+                ],
+                style={'padding': '20px'}
+            )
+        ]
+    )
 
-employee_tour_type_layout = html.Div(
+constants_layout = html.Div(
     [
         html.Div(
             [
-                html.H3(id="emp-model-title", style={"display": "inline-block"}),
+                html.H3(id="const-model-title", style={"display": "inline-block"}),
                 html.Br(),
-                html.Label("Employee Trips by Tour Type:"),
-                dcc.Dropdown(id='employee-tour-type-dropdown', options=[], value=None, clearable=False,
+                html.Label("Select Summary Level:"),
+                dcc.Dropdown(id='const-level-dropdown',
+                             options=[{'label': 'Disaggregated Tour Type', 'value': 'tour'},
+                                      {'label': 'Aggregated Tour Type', 'value': 'general'},
+                                      {'label': 'Employee Trips', 'value': 'emp'}],
+                             value='tour', clearable=False,
                              style={'width': '300px', 'margin-bottom': '20px'}),
-                html.Button("Show Weighted Person Trips", id='toggle-btn-emp', n_clicks=0, style={'margin-bottom': '20px'}),
-                dcc.Graph(id='employee-bar-chart')
+                html.P("Suggested constant adjustment = ln(survey share / model share). "
+                       "Blank adjustments have a zero model or survey share.",
+                       style={"fontStyle": "italic"}),
+                dash_table.DataTable(
+                    id='const-table',
+                    columns=[
+                        {'name': 'Segment', 'id': 'segment'},
+                        {'name': 'Alternative', 'id': 'alternative'},
+                        {'name': 'Model Trip %', 'id': 'trip_pct_model', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                        {'name': 'Survey Trip %', 'id': 'trip_pct_survey', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                        {'name': 'Survey/Model', 'id': 'share_ratio', 'type': 'numeric', 'format': {'specifier': '.3f'}},
+                        {'name': 'ASC Adjustment', 'id': 'asc_adjustment', 'type': 'numeric', 'format': {'specifier': '.4f'}},
+                        {'name': 'Within Survey CI', 'id': 'within_survey_ci'},
+                    ],
+                    data=[],
+                    sort_action='native',
+                    filter_action='native',
+                    export_format='csv',
+                    export_headers='display',
+                    style_cell={'padding': '6px 12px', 'textAlign': 'right'},
+                    style_header={'fontWeight': 'bold'},
+                ),
             ],
             style={'padding': '20px'}
         )
@@ -432,22 +547,21 @@ app.layout = html.Div([
 # --- Buttons ---
 @app.callback(Output("page-content", "children"), Input("url", "pathname"))
 def display_page(pathname):
-    if pathname == "/tour-type-page":
-        return tour_type_layout
-    elif pathname == "/employee-tour-type-page":
-        return employee_tour_type_layout
-    return summary_layout
+    if pathname == "/constants-page":
+        return constants_layout
+    return chart_page_layout(pathname if pathname in CHART_PAGES else "/")
 
 # --- Highlight active button ---
 @app.callback(
     Output("btn-home", "outline"),
     Output("btn-tour", "outline"),
     Output("btn-emp", "outline"),
+    Output("btn-const", "outline"),
     Input("url", "pathname"),
 )
 def highlight_button(pathname):
     # Default: all outlined (not active)
-    home, tour, emp = True, True, True
+    home, tour, emp, const = True, True, True, True
 
     if pathname == "/":
         home = False   # remove outline → filled button
@@ -455,8 +569,10 @@ def highlight_button(pathname):
         tour = False
     elif pathname == "/employee-tour-type-page":
         emp = False
+    elif pathname == "/constants-page":
+        const = False
 
-    return home, tour, emp
+    return home, tour, emp, const
 
 # --- sidebar toggle ---
 from dash import ctx
@@ -475,232 +591,227 @@ def toggle_sidebar(n, is_open):
 # set mode + button styles
 @app.callback(
     Output("mode-store", "data"),
-    Output("btn-mode-trip", "outline"),
-    Output("btn-mode-dest", "outline"),
-    Output("btn-mode-trip", "color"),
-    Output("btn-mode-dest", "color"),
-    Input("btn-mode-trip", "n_clicks"),
-    Input("btn-mode-dest", "n_clicks"),
+    *[Output(f"btn-mode-{m}", "outline") for m in MODES],
+    *[Output(f"btn-mode-{m}", "color") for m in MODES],
+    *[Input(f"btn-mode-{m}", "n_clicks") for m in MODES],
     State("mode-store", "data"),
 )
-def set_mode(n_trip, n_dest, current):
+def set_mode(*args):
+    current = args[-1]
     trg = ctx.triggered_id
-    mode = current
-    if trg == "btn-mode-trip":
-        mode = "trip"
-    elif trg == "btn-mode-dest":
-        mode = "dest"
+    mode = current if current in MODES else "trip"
+    if isinstance(trg, str) and trg.startswith("btn-mode-"):
+        mode = trg[len("btn-mode-"):]
 
     # visual: active button filled (outline=False), inactive outline=True
-    if mode == "trip":
-        return mode, False, True, "primary", "secondary"
-    else:
-        return mode, True, False, "secondary", "primary"
+    outlines = [m != mode for m in MODES]
+    colors = ["primary" if m == mode else "secondary" for m in MODES]
+    return (mode, *outlines, *colors)
+
+# --- Export: the link points at the streaming route below ---
+@app.callback(
+    Output("export-link", "href"),
+    Input("export-scenarios", "value"),
+    Input("export-format", "value"),
+)
+def update_export_link(selected_scenarios, fmt):
+    return "/export?" + urlencode([("format", fmt)] + [("scenario", s) for s in (selected_scenarios or [])])
+
+@app.server.route("/export")
+def export_tables():
+    # served by Flask directly so large exports stream without passing through a Dash callback
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return Response(f"Unknown export format '{fmt}'", status=400)
+    selected = [s for s in request.args.getlist("scenario") if s in catalog_by_label]
+    if not selected:
+        return Response("No valid scenario selected", status=400)
+
+    # scenarios are loaded inside the stream, so the zip formats send their first bytes right away
+    return Response(
+        stream_with_context(stream_export(iter_tables(load_catalog_scenario, selected), fmt)),
+        mimetype=EXPORT_FORMATS[fmt][0],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(selected, fmt)}"'},
+    )
 
 # --- Helpers ---
 def _empty_fig(title: str = ""):
-    return px.bar(title=title)
+    return empty_fig(title)
 
 def _get_scenario_data_safe(scenario):
-    if not scenario or scenario not in santrips_dict:
+    if not scenario:
         raise PreventUpdate
-    return santrips_dict[scenario]
+    data = load_catalog_scenario(scenario)
+    if data is None:
+        raise PreventUpdate
+    return data
 
 def _keys_for_mode(mode: str):
     """Return (df_key, df_general_key, df_emp_key, aggregator_col, category_order_or_none, page_label)."""
     if mode == "dest":
         return ("merge_df2", "merge_df_general2", "merge_df_emp2", "origin_pmsa", None, "Destination Choice")
+    if mode in ACTIVE_DIMENSIONS:
+        return (f"merge_df_{mode}", f"merge_df_general_{mode}", f"merge_df_emp_{mode}", mode, None, ACTIVE_DIMENSIONS[mode]["label"])
     # default trip mode
     return ("merge_df", "merge_df_general", "merge_df_emp", "arrival_mode", X_ORDER, "Trip Mode Choice")
 
-def _sorted_categories(df, col):
-    cats = df[col].dropna().astype(str).unique().tolist()
-    return sorted(cats)
-
-# --- SUMMARY PAGE: titles, summary card, and dropdown  ---
-@app.callback(
-    Output("summary-model-title", "children"),
-    Output("summary-card", "children"),
-    Output("general-tour-type-dropdown", "options"),
-    Output("general-tour-type-dropdown", "value"),
-    Input("scenario-dd", "value"),
-    Input("url", "pathname"),
-    Input("mode-store", "data"),
-)
-def refresh_summary_for_scenario(scenario, pathname, mode):
-    if pathname not in ("/", None):
-        raise PreventUpdate
-    d = _get_scenario_data_safe(scenario)
-    _, df_general_key, _, aggregator_col, _, mode_label = _keys_for_mode(mode)
-    df_general = d[df_general_key]
-
-    model_title = f"Model: {selected_model} • {mode_label}"
-    summary_card = generate_summary_card(df_general)
-
-    gen_vals = df_general['tour_type_general'].dropna().unique().tolist()
-    gen_opts = [{'label': t, 'value': t} for t in gen_vals]
-    gen_val = 'Total' if 'Total' in gen_vals else (gen_vals[0] if gen_vals else None)
-    return model_title, summary_card, gen_opts, gen_val
-
-# --- TOUR PAGE: titles, dropdown ---
+# --- CONSTANTS PAGE: title and suggestion table ---
 @app.callback(
-    Output("tour-model-title", "children"),
-    Output("tour-type-dropdown", "options"),
-    Output("tour-type-dropdown", "value"),
+    Output("const-model-title", "children"),
+    Output("const-table", "data"),
     Input("scenario-dd", "value"),
     Input("url", "pathname"),
     Input("mode-store", "data"),
+    Input("const-level-dropdown", "value"),
 )
-def refresh_tour_for_scenario(scenario, pathname, mode):
-    if pathname != "/tour-type-page":
+def refresh_constants_for_scenario(scenario, pathname, mode, level):
+    if pathname != "/constants-page":
         raise PreventUpdate
-    d = _get_scenario_data_safe(scenario)
-    df_key, _, _, _, _, mode_label = _keys_for_mode(mode)
-    df = d[df_key]
+    _get_scenario_data_safe(scenario)
+    df_key, df_general_key, df_emp_key, aggregator_col, _, mode_label = _keys_for_mode(mode)
+    if level == "general":
+        key, segment_col = df_general_key, "tour_type_general"
+    else:
+        key, segment_col = (df_emp_key if level == "emp" else df_key), "tour_type"
+
+    # suggestions are computed for all scenarios at once and cached per scenario
+    suggestions = constant_suggestions(santrips_dict, key, segment_col, aggregator_col)
+    table = suggestions[suggestions['scenario'] == scenario].drop(columns='scenario')
+    table = table.sort_values(['segment', 'alternative'], key=lambda c: c.astype(str))
+    table['within_survey_ci'] = table['within_survey_ci'].map({True: 'Yes', False: 'No'}).fillna('')
+
+    model_title = f"Model: {selected_model} • {mode_label} • Calibration Constants"
+    return model_title, table.to_dict('records')
+
+
+# --- Page view models ---
+def build_view_model(data, mode, pathname):
+    """Everything a chart page shows for one (scenario, mode): titles, summary card, dropdown and per-segment rows.
+    None when the scenario has no table for the mode (its trips lack the dimension's column)."""
+    page = CHART_PAGES[pathname]
+    df_keys = _keys_for_mode(mode)
+    _, _, _, aggregator_col, cat_order, mode_label = df_keys
+    if df_keys[page["key_index"]] not in data:
+        return None
+    df = data[df_keys[page["key_index"]]]
+
+    segments = df[page["segment_col"]].dropna().unique().tolist()
+    if page["default_total"] and 'Total' in segments:
+        default_segment = 'Total'
+    else:
+        default_segment = segments[0] if segments else None
+
+    return {
+        "title": f"Model: {selected_model} • {mode_label}",
+        "card": generate_summary_card(df, survey_segment_ci) if page["card"] else None,
+        "options": [{'label': t, 'value': t} for t in segments],
+        "default_segment": default_segment,
+        "aggregator_col": aggregator_col,
+        "categories": bar_categories(df, aggregator_col, cat_order),
+        "rows": dict(list(df.groupby(page["segment_col"], sort=False))),
+    }
 
-    model_title = f"Model: {selected_model} • {mode_label}"
-    tour_vals = df['tour_type'].dropna().unique().tolist()
-    tour_opts = [{'label': t, 'value': t} for t in tour_vals]
-    tour_val = 'Total' if 'Total' in tour_vals else (tour_vals[0] if tour_vals else None)
-    return model_title, tour_opts, tour_val
+# precomputed per (scenario, mode, page)
+view_models = {
+    (scenario, mode, pathname): build_view_model(data, mode, pathname)
+    for scenario, data in santrips_dict.items()
+    for mode in MODES
+    for pathname in CHART_PAGES
+}
 
+_catalog_load_lock = threading.Lock()
 
-# --- EMPLOYEE PAGE: titles, dropdown ---
+def load_catalog_scenario(scenario):
+    """
+    Summary tables of a catalog scenario, loaded the first time it is selected and reloaded when its
+    metadata or model files changed since; None if it is not in the catalog or has never loaded.
+    A failed reload keeps the previous tables and is retried on the next selection.
+    """
+    entry = catalog_by_label.get(scenario)
+    if entry is None:
+        return santrips_dict.get(scenario)
+    fingerprint = file_fingerprint(entry['path'], model_files(model_plugin))
+    if loaded_fingerprints.get(scenario) == fingerprint:
+        return santrips_dict[scenario]
+
+    with _catalog_load_lock:
+        if loaded_fingerprints.get(scenario) == fingerprint:
+            return santrips_dict[scenario]
+        if scenario in santrips_dict:
+            print(f"Scenario {scenario} changed on disk, reloading")
+        try:
+            data = load_model_data({entry['path']: {}}, selected_model, env, user)[entry['path']]
+            summary = summarize_scenario(data)
+        except Exception as e:
+            print(f"⚠️ Could not load scenario {scenario} from {entry['path']}: {e}")
+            return santrips_dict.get(scenario)
+        santrips_dict[scenario] = summary
+        loaded_fingerprints[scenario] = fingerprint
+        # cached suggestions of a reloaded scenario are stale; they are recomputed for it alone
+        invalidate_suggestions(scenario)
+        for mode in MODES:
+            for pathname in CHART_PAGES:
+                view_models[(scenario, mode, pathname)] = build_view_model(santrips_dict[scenario], mode, pathname)
+        return santrips_dict[scenario]
+
+
+# --- Chart pages: title, summary card, dropdown and bar chart ---
+# A chart is fully rendered once per (scenario, mode, page, weighted/percentage view) and the rendered
+# key is kept in a store on the page; switching tour type then only sends a Patch of y, error bars and title.
 @app.callback(
-    Output("emp-model-title", "children"),
-    Output("employee-tour-type-dropdown", "options"),
-    Output("employee-tour-type-dropdown", "value"),
+    Output("page-title", "children"),
+    Output("summary-card", "children"),
+    Output("segment-dropdown", "options"),
+    Output("segment-dropdown", "value"),
+    Output("bar-chart", "figure"),
+    Output("toggle-btn", "children"),
+    Output("bar-key", "data"),
     Input("scenario-dd", "value"),
     Input("url", "pathname"),
     Input("mode-store", "data"),
+    Input("segment-dropdown", "value"),
+    Input("toggle-btn", "n_clicks"),
+    State("bar-key", "data"),
 )
-def refresh_emp_for_scenario(scenario, pathname, mode):
-    if pathname != "/employee-tour-type-page":
+def update_chart_page(scenario, pathname, mode, segment, n_clicks, rendered_key):
+    if pathname == "/constants-page":
         raise PreventUpdate
-    d = _get_scenario_data_safe(scenario)
-    _, _, df_emp_key, _, _, mode_label = _keys_for_mode(mode)
-    df_emp = d[df_emp_key]
-
-    model_title = f"Model: {selected_model} • {mode_label}"
-    vals = df_emp['tour_type'].dropna().unique().tolist()
-    opts = [{'label': t, 'value': t} for t in vals]
-    val = vals[0] if vals else None
-    return model_title, opts, val
-
-
-# --- Bar Charts ---
-bar_color_sequence = ["#ff7f0e","#4461e2"]  # survey vs. model
-
-@app.callback(
-    Output('general-bar-chart', 'figure'),
-    Output('toggle-btn', 'children'),
-    Input('scenario-dd', 'value'),
-    Input('general-tour-type-dropdown', 'value'),
-    Input('toggle-btn', 'n_clicks'),
-    Input('mode-store', 'data'),
-)
-def update_general_bar_chart(scenario, selected_general_tour_type, n_clicks, mode):
-    if not scenario or scenario not in santrips_dict or not selected_general_tour_type:
-        return _empty_fig("No data"), "Show Weighted Person Trips"
-
-    df_general_key = _keys_for_mode(mode)[1]
-    aggregator_col = _keys_for_mode(mode)[3]
-    cat_order = _keys_for_mode(mode)[4]
-
-    df = _get_scenario_data_safe(scenario)[df_general_key]
-    filtered = df[df['tour_type_general'] == selected_general_tour_type]
-    if filtered.empty:
-        btn = "Show Percentage of Trips" if (n_clicks % 2 == 1) else "Show Weighted Person Trips"
-        return _empty_fig("No data"), btn
-
-    show_weighted = (n_clicks % 2 == 1)
-    if show_weighted:
-        value_vars = ["trip_by_mode_survey", "trip_by_mode_model"]; y_label = "Person Trips"; btn_text = "Show Percentage of Trips"
+    pathname = pathname if pathname in CHART_PAGES else "/"
+    page = CHART_PAGES[pathname]
+    if scenario:
+        load_catalog_scenario(scenario)
+    vm = view_models.get((scenario, mode, pathname))
+    if vm is None:
+        # clear the previous scenario's title, card and tour types next to the empty chart
+        return "", None, [], None, _empty_fig("No data"), "Show Weighted Person Trips", None
+
+    # a new scenario, page or mode resets the header and the dropdown; otherwise only the chart changes
+    if ctx.triggered_id in (None, "scenario-dd", "url", "mode-store"):
+        header = [vm["title"], vm["card"], vm["options"], vm["default_segment"]]
+        segment = vm["default_segment"]
+        rendered_key = None
     else:
-        value_vars = ["trip_pct_survey", "trip_pct_model"]; y_label = "Percentage of Trips"; btn_text = "Show Weighted Person Trips"
-
-    # category order
-    orders = {aggregator_col: (cat_order if cat_order else _sorted_categories(filtered, aggregator_col))}
-
-    fig = px.bar(
-        filtered.melt(id_vars=aggregator_col, value_vars=value_vars, var_name="Source", value_name=y_label),
-        x=aggregator_col, y=y_label, color="Source", barmode="group",
-        category_orders=orders, color_discrete_sequence=bar_color_sequence,
-        title=f"Model vs Survey {y_label} by {aggregator_col} ({selected_general_tour_type})"
-    )
-    return fig, btn_text
-
-
-@app.callback(
-    Output('bar-chart', 'figure'),
-    Output('toggle-btn-tour', 'children'),
-    Input('scenario-dd', 'value'),
-    Input('tour-type-dropdown', 'value'),
-    Input('toggle-btn-tour', 'n_clicks'),
-    Input('mode-store', 'data'),
-)
-def update_bar_chart(scenario, selected_tour_type, n_clicks, mode):
-    if not scenario or scenario not in santrips_dict or not selected_tour_type:
-        return _empty_fig("No data"), "Show Weighted Person Trips"
-
-    df_key, _, _, aggregator_col, cat_order, _ = _keys_for_mode(mode)
-    df = _get_scenario_data_safe(scenario)[df_key]
-    filtered = df[df['tour_type'] == selected_tour_type]
-    if filtered.empty:
-        btn = "Show Percentage of Trips" if (n_clicks % 2 == 1) else "Show Weighted Person Trips"
-        return _empty_fig("No data"), btn
+        header = [no_update] * 4
 
     show_weighted = (n_clicks % 2 == 1)
-    if show_weighted:
-        value_vars = ["trip_survey", "trip_model"]; y_label = "Weighted Person Trips"; btn_text = "Show Percentage of Trips"
-    else:
-        value_vars = ["trip_pct_survey", "trip_pct_model"]; y_label = "Percentage of Weighted Person Trips"; btn_text = "Show Weighted Person Trips"
-
-    orders = {aggregator_col: (cat_order if cat_order else _sorted_categories(filtered, aggregator_col))}
-
-    fig = px.bar(
-        filtered.melt(id_vars=aggregator_col, value_vars=value_vars, var_name="Source", value_name=y_label),
-        x=aggregator_col, y=y_label, color="Source", barmode="group",
-        category_orders=orders, color_discrete_sequence=bar_color_sequence,
-        title=f"Model vs Survey {y_label} by {aggregator_col} ({selected_tour_type})"
-    )
-    return fig, btn_text
+    btn_text = "Show Percentage of Trips" if show_weighted else "Show Weighted Person Trips"
+    filtered = vm["rows"].get(segment)
+    if filtered is None or filtered.empty:
+        return *header, _empty_fig("No data"), btn_text, None
 
-
-@app.callback(
-    Output('employee-bar-chart', 'figure'),
-    Output('toggle-btn-emp', 'children'),
-    Input('scenario-dd', 'value'),
-    Input('employee-tour-type-dropdown', 'value'),
-    Input('toggle-btn-emp', 'n_clicks'),
-    Input('mode-store', 'data'),
-)
-def update_employee_bar_chart(scenario, selected_tour_type, n_clicks, mode):
-    if not scenario or scenario not in santrips_dict or not selected_tour_type:
-        return _empty_fig("No data"), "Show Weighted Person Trips"
-
-    _, _, df_emp_key, aggregator_col, cat_order, _ = _keys_for_mode(mode)
-    df = _get_scenario_data_safe(scenario)[df_emp_key]
-    filtered = df[df['tour_type'] == selected_tour_type]
-    if filtered.empty:
-        btn = "Show Percentage of Trips" if (n_clicks % 2 == 1) else "Show Weighted Person Trips"
-        return _empty_fig("No data"), btn
-
-    show_weighted = (n_clicks % 2 == 1)
     if show_weighted:
-        value_vars = ["trip_survey", "trip_model"]; y_label = "Weighted Person Trips"; btn_text = "Show Percentage of Trips"
+        value_vars = page["weighted_vars"]; y_label = page["weighted_label"]
     else:
-        value_vars = ["trip_pct_survey", "trip_pct_model"]; y_label = "Percentage of Weighted Person Trips"; btn_text = "Show Weighted Person Trips"
+        value_vars = ["trip_pct_survey", "trip_pct_model"]; y_label = page["pct_label"]
 
-    orders = {aggregator_col: (cat_order if cat_order else _sorted_categories(filtered, aggregator_col))}
+    aggregator_col = vm["aggregator_col"]
+    title = f"Model vs Survey {y_label} by {aggregator_col} ({page['title_segment'].format(segment)})"
+    key = [scenario, mode, pathname, show_weighted]
+    if rendered_key == key:
+        return *header, bar_patch(filtered, aggregator_col, vm["categories"], value_vars, title), no_update, no_update
 
-    fig = px.bar(
-        filtered.melt(id_vars=aggregator_col, value_vars=value_vars, var_name="Source", value_name=y_label),
-        x=aggregator_col, y=y_label, color="Source", barmode="group",
-        category_orders=orders, color_discrete_sequence=bar_color_sequence,
-        title=f"Model vs Survey {y_label} by {aggregator_col} (Employee - {selected_tour_type})"
-    )
-    return fig, btn_text
+    fig = bar_figure(mode, page["page"], filtered, aggregator_col, vm["categories"], value_vars, y_label, title)
+    return *header, fig, btn_text, key
 
 
 # --- Run ---
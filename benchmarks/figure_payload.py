@@ -0,0 +1,81 @@
+"""
+Bar chart response size and server time per tour-type switch.
+
+Compares the previous px.bar figure per interaction with the template-based full figure
+and the Patch update used when only the tour type changes, on a synthetic merge_df frame.
+
+    python benchmarks/figure_payload.py [--repeat 200]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from plotly.io.json import to_json_plotly
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from figures import bar_categories, bar_figure, bar_patch, bar_color_sequence  # noqa: E402
+
+MODES = ['Drop-off/Pick up', 'UBER/Lyft', 'Taxi', 'Personal Car Parked',
+         'Shared Shuttle Van', 'Rental Car', 'Walk', 'Public Transportation']
+TOUR_TYPES = ['res_nb', 'res_bus', 'vis_nb', 'vis_bus', 'Total']
+
+
+def synthetic_merge_df(seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame([(m, t) for t in TOUR_TYPES for m in MODES], columns=['arrival_mode', 'tour_type'])
+    for source in ('model', 'survey'):
+        df[f'trip_{source}'] = rng.gamma(2.0, 500.0, len(df))
+        df[f'trip_pct_{source}'] = df[f'trip_{source}'] / df.groupby('tour_type')[f'trip_{source}'].transform('sum') * 100
+    df['trip_pct_survey_lo'] = df['trip_pct_survey'] * 0.9
+    df['trip_pct_survey_hi'] = df['trip_pct_survey'] * 1.1
+    return df
+
+
+def px_figure(filtered, value_vars, y_label, title):
+    # previous implementation: a new px.bar from a melted frame on every interaction
+    melted = filtered.melt(id_vars='arrival_mode', value_vars=value_vars, var_name="Source", value_name=y_label)
+    return px.bar(melted, x='arrival_mode', y=y_label, color="Source", barmode="group",
+                  category_orders={'arrival_mode': MODES}, color_discrete_sequence=bar_color_sequence,
+                  title=title)
+
+
+def measure(name, build, repeat):
+    build(0)  # warm up
+    start = time.perf_counter()
+    sizes = [len(to_json_plotly(build(i).to_plotly_json())) for i in range(repeat)]
+    elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+    print(f"{name:<24} {np.mean(sizes):>12.0f} {elapsed_ms:>14.2f}")
+    return np.mean(sizes), elapsed_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="interactions per measurement")
+    args = parser.parse_args(argv)
+
+    df = synthetic_merge_df()
+    value_vars = ["trip_pct_survey", "trip_pct_model"]
+    y_label = "Percentage of Weighted Person Trips"
+    categories = bar_categories(df, 'arrival_mode', MODES)
+
+    def filtered(i):
+        return df[df['tour_type'] == TOUR_TYPES[i % len(TOUR_TYPES)]]
+
+    def title(i):
+        return f"Model vs Survey {y_label} by arrival_mode ({TOUR_TYPES[i % len(TOUR_TYPES)]})"
+
+    print(f"{'response':<24} {'bytes (JSON)':>12} {'server ms/call':>14}")
+    px_size, px_ms = measure("px.bar (previous)", lambda i: px_figure(filtered(i), value_vars, y_label, title(i)), args.repeat)
+    measure("template full figure", lambda i: bar_figure("trip", "tour", filtered(i), 'arrival_mode', categories,
+                                                          value_vars, y_label, title(i)), args.repeat)
+    patch_size, patch_ms = measure("Patch (tour type)", lambda i: bar_patch(filtered(i), 'arrival_mode', categories,
+                                                                             value_vars, title(i)), args.repeat)
+    print(f"\nPatch vs px.bar: {px_size / patch_size:.1f}x smaller, {px_ms / patch_ms:.1f}x less server time")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Import-time startup report for the CalibViz app module.
+
+Runs the top-level imports of app.py in a fresh interpreter under `python -X importtime`
+(data loading is not included), prints the slowest top-level packages and fails when the
+total exceeds the budget or a deferred backend module is imported at startup.
+
+    python benchmarks/startup_report.py [--budget-ms 1000] [--top 15]
+"""
+import os
+import re
+import ast
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that must only be imported when their code path is used
+DEFERRED_MODULES = ["databricks.sdk", "databricks.sql", "dash_leaflet", "openpyxl"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def app_imports(path=os.path.join(ROOT, "app.py")):
+    """Source of the module-level import statements of app.py."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def run_importtime(code):
+    """Run code under -X importtime; return [(self_us, cumulative_us, depth, module)]."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if m:
+            rows.append((int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2, m.group(4)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="maximum total import time (default 1000)")
+    parser.add_argument("--top", type=int, default=15, help="number of top-level packages to list")
+    args = parser.parse_args(argv)
+
+    rows = run_importtime(app_imports())
+    top_level = sorted((r for r in rows if r[2] == 0), key=lambda r: r[1], reverse=True)
+    total_ms = sum(r[1] for r in top_level) / 1000
+    imported = {r[3] for r in rows}
+
+    print(f"{'cumulative [ms]':>16} {'self [ms]':>10}  module")
+    for self_us, cumulative_us, _, module in top_level[:args.top]:
+        print(f"{cumulative_us / 1000:16.1f} {self_us / 1000:10.1f}  {module}")
+    print(f"\nTotal import time of app.py dependencies: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    eager = [m for m in DEFERRED_MODULES if m in imported]
+    if eager:
+        failures.append(f"deferred modules imported at startup: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.0f} ms exceeds budget of {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
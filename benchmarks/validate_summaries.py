@@ -0,0 +1,376 @@
+"""
+Equivalence and timing check of the summary tables: reference path vs. the path the app runs.
+
+Reference: the loader as it was before chunked loading (whole trip and tour files read, merged with the
+pmsa crosswalk and the tours, filtered and recoded, plain columns) and the original process_santrips,
+both kept frozen in this script. App: config.read_model_trips and summaries.process_santrips, and
+pivot.pivot_tables over the union of model and survey values for the pivot dimensions, as in app.py.
+
+Both paths are merged with their survey summaries by merge_summarized_trip_data, and every merge_df*
+table is diffed within a tolerance: arrival mode, origin pmsa and each pivot dimension whose column is in
+the model trips (model tables alone for a dimension without a survey column). Synthetic runs always add a
+synthetic dimension with a survey column, so pivot_tables is compared whatever is configured. Cells of the reference only must carry no trips (process_santrips fills
+some cells with zeros that pivot_tables leaves out); cells of the app only must carry no survey trips
+(pivot dimensions also list model values the survey never has). Survey intervals are not part of the
+check. Exits with status 1 on any difference.
+
+    python benchmarks/validate_summaries.py [--rows 1000000] [--repeat 1]      # synthetic scenario
+    python benchmarks/validate_summaries.py --scenario <path_to_scn> [...]     # scenarios from .env settings
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from config import PIVOT_DIMENSIONS, MODEL_TRIP_COLUMNS, read_model_trips  # noqa: E402
+from model_plugins import get_model  # noqa: E402
+from pivot import pivot_tables, category_sort_key  # noqa: E402
+from summaries import general_tour_type, process_santrips, merge_summarized_trip_data  # noqa: E402
+
+# merge_df* table suffix and aggregator of the Trip Mode Choice and Destination Choice tables
+SUMMARY_GROUPS = [("", 'arrival_mode'), ("2", 'origin_pmsa')]
+
+# added to PIVOT_DIMENSIONS for synthetic runs
+SYNTHETIC_DIMENSION = {"synthetic_group": {"label": "Synthetic Group", "model_col": "synthetic_group", "survey_col": "synthetic_group"}}
+
+# model trip modes of the synthetic scenario (match_airport_trip_modes recodes some of them)
+SYNTHETIC_TRIP_MODES = ['DRIVEALONE', 'SHARED2', 'SHARED3', 'TAXI', 'WALK']
+
+
+# --- Reference path (frozen) ---
+def reference_trips(scenario_path, plugin, mgra2pmsa_xref):
+    """
+    Trips of one scenario loaded the way load_model_data did before chunked loading, for the plugin's
+    files and column mappings (the original was written for airport.SAN).
+    """
+    folder = os.path.join(scenario_path, "output", plugin["output_dir"])
+    model_trip = pd.read_csv(os.path.join(folder, plugin["trip_file"]))
+    model_tour = pd.read_csv(os.path.join(folder, plugin["tour_file"]))
+    pivot_cols = [d['model_col'] for d in PIVOT_DIMENSIONS.values() if d['model_col'] not in MODEL_TRIP_COLUMNS]
+    tour_cols = dict(plugin["tour_columns"], **{c: c for c in pivot_cols if c in model_tour and c not in model_trip})
+    model_trip = pd.DataFrame(dict({col: model_trip[src] for col, src in plugin["trip_columns"].items()},
+                                   **{c: model_trip[c] for c in pivot_cols if c in model_trip}))
+    model_tour = pd.DataFrame(dict(tour_id=model_tour['tour_id'], **{col: model_tour[src] for col, src in tour_cols.items()}))
+
+    model_trip = model_trip.merge(mgra2pmsa_xref, left_on='origin_mgra', right_on='mgra', how='left')
+    df1 = model_trip.merge(model_tour, on='tour_id')
+    df1 = df1[MODEL_TRIP_COLUMNS + [c for c in pivot_cols if c in df1.columns]]
+    if plugin["trip_filter"]:
+        df1 = df1.query(plugin["trip_filter"]).copy()
+
+    df1['tour_type'] = df1['tour_type'].replace(plugin["tour_types"])
+    if plugin["prepare"]:
+        df1 = plugin["prepare"](df1)
+    df1['arrival_mode'] = df1['arrival_mode'].replace(plugin["arrival_modes"])
+    return df1
+
+
+def reference_process_santrips(trip_data, aggregator, emp, mode_labels):
+    """process_santrips as it was before the categorical and pivot changes; mode_labels replaces the inline mapping."""
+    # ignore employee trips if emp is set to False
+    if emp == False:
+        trip_data = trip_data.query("tour_type != 'emp'").copy()
+    # include ONLY employee trips if emp is set to True
+    else:
+        trip_data = trip_data.query("tour_type == 'emp'").copy()
+
+    trip_data['arrival_mode'] = trip_data['arrival_mode'].replace(mode_labels)
+
+    # rename columns for clarity
+    trip_data = trip_data.rename(columns={'weight_person_trip': 'trip'})
+
+    # group by user-input aggregator (e.g., arrival_mode) and tour type and calculate percentage of trips by tour type
+    trip_by_mode = trip_data.groupby([aggregator,'tour_type'])['trip'].sum().reset_index()
+    trip_by_mode['trip_pct'] = trip_by_mode['trip'] / trip_by_mode.groupby('tour_type')['trip'].transform('sum') * 100
+
+    # create total row from trip_by_mode and calculate percentage of trips
+    trip_mode_totals = trip_by_mode.groupby(aggregator)['trip'].sum().reset_index()
+    trip_mode_totals['tour_type'] = 'Total'
+    trip_mode_totals['trip_pct'] = trip_mode_totals['trip'] / trip_mode_totals['trip'].sum() * 100
+
+    if emp == False:
+        # concatenate the total row to the trip_by_mode DataFrame
+        trip_by_dTour_aggMode = pd.concat([trip_by_mode, trip_mode_totals], ignore_index=True)
+    else:
+        trip_by_dTour_aggMode = trip_by_mode.copy()
+
+    # create a new column for the general tour type
+    trip_by_dTour_aggMode['tour_type_general'] = trip_by_dTour_aggMode['tour_type'].apply(
+    lambda x: 'resident' if str(x).startswith('res_') else
+              'visitor' if str(x).startswith('vis_') else
+              'employee' if str(x).startswith('emp') else
+              'Total' if str(x) == 'Total' else
+              x
+    )
+
+    # Ensure all modes in unique_modes are present in merged_df for each tour_type
+    if aggregator == 'arrival_mode':
+        unique_modes = list(set(mode_labels.values()))
+    elif aggregator == 'origin_pmsa':
+        unique_modes = list(trip_data['origin_pmsa'].unique())
+    else:
+        # pivot dimensions came later; their observed values, as for origin_pmsa
+        unique_modes = list(trip_data[aggregator].unique())
+    all_tour_types = trip_by_dTour_aggMode['tour_type'].unique()
+    rows_to_add = []
+
+    for tour_type in all_tour_types:
+        existing_modes = set(trip_by_dTour_aggMode.loc[trip_by_dTour_aggMode['tour_type'] == tour_type, aggregator])
+        missing_modes = set(unique_modes) - existing_modes
+        for mode in missing_modes:
+            # Find the general tour type for this tour_type
+            general_type = trip_by_dTour_aggMode.loc[trip_by_dTour_aggMode['tour_type'] == tour_type, 'tour_type_general'].iloc[0]
+            rows_to_add.append({
+                aggregator: mode,
+                'tour_type': tour_type,
+                'trip': 0.0,
+                'trip_pct': 0.0,
+                'tour_type_general': general_type
+            })
+    trip_by_dTour_aggMode = pd.concat([trip_by_dTour_aggMode, pd.DataFrame(rows_to_add)], ignore_index=True)
+
+    if emp == False:
+        # calculate total trip by general tour type and by arrival mode
+        trip_by_geTour_aggMode = trip_by_dTour_aggMode.query("tour_type_general != 'Total'").copy()
+        trip_by_geTour_aggMode = trip_by_geTour_aggMode.groupby(['tour_type_general', aggregator])['trip'].sum().reset_index()
+
+        # calculate trip percentage by general tour type and by arrival mode
+        total_trips_by_geTour = trip_by_geTour_aggMode.groupby(['tour_type_general'])['trip'].sum().reset_index()
+        trip_by_geTour_aggMode = trip_by_geTour_aggMode.merge(total_trips_by_geTour, on='tour_type_general', suffixes=('_by_mode', '_total'))
+        trip_by_geTour_aggMode['trip_pct'] = trip_by_geTour_aggMode['trip_by_mode'] / trip_by_geTour_aggMode['trip_total'] * 100
+
+        # combine trips of all general tour types and calculate overall total
+        trip_geMode_totals = trip_by_dTour_aggMode.query("tour_type == 'Total'").copy()
+        trip_geMode_totals = trip_geMode_totals.rename(columns={'trip': 'trip_by_mode'}).drop(['tour_type'], axis=1)
+        trip_geMode_totals['trip_total'] = trip_geMode_totals['trip_by_mode'].sum()
+        trip_by_geTour_aggMode = pd.concat([trip_by_geTour_aggMode, trip_geMode_totals], ignore_index=True)
+
+        return trip_by_dTour_aggMode, trip_by_geTour_aggMode
+    else:
+        return trip_by_dTour_aggMode
+
+
+# --- Inputs ---
+def synthetic_scenario(folder, n, plugin, seed=0):
+    """Write the plugin's trip and tour files (n trips, model codes) under folder; return its mgra -> pmsa crosswalk."""
+    rng = np.random.default_rng(seed)
+    tour_types = list(plugin["tour_types"]) or ['work', 'school', 'shopping', 'other']
+    arrival_modes = list(plugin["arrival_modes"]) or list(plugin["mode_labels"])
+    n_tours = max(n // 2, 1)
+    tours = pd.DataFrame({'tour_id': np.arange(n_tours), 'tour_type': rng.choice(tour_types + ['external'], n_tours)})
+    values = {
+        'tour_id': rng.integers(0, n_tours + n_tours // 100 + 1, n),   # a few trips without a tour
+        'origin_mgra': rng.integers(1, 24000, n),
+        'trip_mode': rng.choice(SYNTHETIC_TRIP_MODES, n),
+        'arrival_mode': rng.choice(arrival_modes, n),
+        'outbound': rng.random(n) < 0.8,
+        'weight_person_trip': rng.choice([0.5, 1.0, 2.0], n),
+    }
+    # a trip file column feeding several app columns (trip_mode and arrival_mode) holds the last one's codes
+    trips = pd.DataFrame({src: values[col] for col, src in plugin["trip_columns"].items()})
+    for cfg in PIVOT_DIMENSIONS.values():
+        if cfg['model_col'] not in trips:
+            trips[cfg['model_col']] = rng.integers(1, 6, n)
+
+    out = os.path.join(folder, "output", plugin["output_dir"])
+    os.makedirs(out)
+    trips.to_csv(os.path.join(out, plugin["trip_file"]), index=False)
+    tours.to_csv(os.path.join(out, plugin["tour_file"]), index=False)
+
+    mgra = np.arange(1, 24000)
+    mgra = mgra[mgra % 997 != 0]   # origins outside the crosswalk get no pmsa
+    return pd.DataFrame({'mgra': mgra, 'taz': mgra // 5, 'origin_pmsa': rng.integers(1, 9, len(mgra))})
+
+
+def synthetic_survey(n, plugin, seed=1):
+    """Survey trips in the app's survey columns."""
+    rng = np.random.default_rng(seed)
+    tour_types = sorted(set(plugin["tour_types"].values())) or ['work', 'school', 'shopping', 'other']
+    survey_modes = sorted(set(plugin["arrival_modes"].values())) or list(plugin["mode_labels"])
+    survey = pd.DataFrame({
+        'arrival_mode': rng.choice(survey_modes, n),
+        'tour_type': rng.choice(tour_types, n),
+        'origin_pmsa': rng.integers(1, 9, n),
+        'weight_person_trip': rng.gamma(2.0, 50.0, n),
+    })
+    for cfg in PIVOT_DIMENSIONS.values():
+        if cfg['survey_col'] is None:
+            continue
+        # dimensions are synthetic 1-5 codes, except a dimension over the model's trip_mode
+        survey[cfg['survey_col']] = (rng.choice(SYNTHETIC_TRIP_MODES, n) if cfg['model_col'] == 'trip_mode'
+                                     else rng.integers(1, 6, n))
+    return survey
+
+
+def scenario_inputs():
+    """Selected model plugin, survey trips and mgra -> pmsa crosswalk, loaded like the app (reads .env)."""
+    from dotenv import load_dotenv, find_dotenv
+    from config import get_connection, load_pmsa_xref, load_survey_data
+    load_dotenv(find_dotenv(), override=False)
+    user = os.getenv("USER_AGENT_ENTRY")
+    plugin = get_model(os.getenv("SELECTED_MODEL", "airport.SAN"))
+    survey = load_survey_data(user, plugin, os.getenv("SURVEY_PATH"))["santrips"]
+    return plugin, survey, load_pmsa_xref(get_connection(user))
+
+
+def active_dimensions(model, survey):
+    # the pivot dimensions the app summarizes for this scenario; survey_col None where the survey lacks it
+    return {name: dict(cfg, survey_col=cfg['survey_col'] if cfg['survey_col'] is not None and cfg['survey_col'] in survey else None)
+            for name, cfg in PIVOT_DIMENSIONS.items() if cfg['model_col'] in model}
+
+
+# --- Both paths ---
+def merged_tables(suffix, aggregator, model_tables, survey_tables=None):
+    # without survey tables (a model-only dimension) the model tables are compared as they are
+    keys = (['tour_type', aggregator], ['tour_type_general', aggregator], ['tour_type', aggregator])
+    names = (f"merge_df{suffix}", f"merge_df_general{suffix}", f"merge_df_emp{suffix}")
+    return {name: (m if s is None else merge_summarized_trip_data(m, s, key), key)
+            for name, m, s, key in zip(names, model_tables, survey_tables or (None,) * 3, keys)}
+
+
+def reference_tables(model, survey, dimensions, mode_labels):
+    groups = [(suffix, aggregator, model, survey) for suffix, aggregator in SUMMARY_GROUPS]
+    cols = ['tour_type', 'arrival_mode', 'weight_person_trip']
+    for name, cfg in dimensions.items():
+        groups.append((f"_{name}", name,
+                       model[cols + [cfg['model_col']]].rename(columns={cfg['model_col']: name}),
+                       survey[cols + [cfg['survey_col']]].rename(columns={cfg['survey_col']: name})
+                       if cfg['survey_col'] is not None else None))
+
+    tables = {}
+    for suffix, aggregator, model_trips, survey_trips in groups:
+        summaries = []
+        for trips in (model_trips, survey_trips):
+            if trips is None:
+                continue
+            disaggregated, general = reference_process_santrips(trips, aggregator, False, mode_labels)
+            summaries.append((disaggregated, general, reference_process_santrips(trips, aggregator, True, mode_labels)))
+        tables.update(merged_tables(suffix, aggregator, *summaries))
+    return tables
+
+
+def app_tables(model, survey, dimensions, mode_labels):
+    # summarize_scenario of app.py, with survey summaries computed here instead of at app startup
+    tables = {}
+    for suffix, aggregator in SUMMARY_GROUPS:
+        summaries = []
+        for trips in (model, survey):
+            disaggregated, general = process_santrips(trips, aggregator, False, mode_labels)
+            summaries.append((disaggregated, general, process_santrips(trips, aggregator, True, mode_labels)))
+        tables.update(merged_tables(suffix, aggregator, *summaries))
+
+    for name, cfg in dimensions.items():
+        values = set(model[cfg['model_col']].dropna().unique().tolist())
+        if cfg['survey_col'] is not None:
+            values.update(survey[cfg['survey_col']].dropna().unique().tolist())
+        categories = sorted(values, key=category_sort_key)
+        model_tables = pivot_tables(model, cfg['model_col'], name, categories, general_tour_type)
+        survey_tables = (pivot_tables(survey, cfg['survey_col'], name, categories, general_tour_type)
+                         if cfg['survey_col'] is not None else None)
+        tables.update(merged_tables(f"_{name}", name, model_tables, survey_tables))
+    return tables
+
+
+def timed(fn, repeat, *args):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+# --- Diff ---
+def diff_table(ref, opt, keys, rtol, atol):
+    """(rows, mismatching rows, largest absolute difference, columns missing from one output) of two tables."""
+    ref = ref.assign(**{k: ref[k].astype(object) for k in keys})
+    opt = opt.assign(**{k: opt[k].astype(object) for k in keys})
+    both = ref.merge(opt, on=keys, how='outer', suffixes=('_ref', '_opt'), indicator=True)
+    columns = [c for c in ref.columns if c not in keys and c in opt.columns]
+    missing = sorted(set(ref.columns) ^ set(opt.columns))
+    in_both = (both['_merge'] == 'both').to_numpy()
+
+    bad = np.zeros(len(both), dtype=bool)
+    max_diff = 0.0
+    for col in columns:
+        a, b = both[f"{col}_ref"], both[f"{col}_opt"]
+        if pd.api.types.is_numeric_dtype(ref[col]) and pd.api.types.is_numeric_dtype(opt[col]):
+            a, b = a.to_numpy(dtype=float), b.to_numpy(dtype=float)
+            with np.errstate(invalid='ignore'):
+                diff = np.abs(a - b)
+            max_diff = max(max_diff, np.nanmax(diff[in_both], initial=0.0))
+            bad |= in_both & ~np.isclose(a, b, rtol=rtol, atol=atol, equal_nan=True)
+            if 'total' not in col:
+                # a cell of the reference only must carry no trips, a cell of the app only no survey trips
+                ref_only = (both['_merge'] == 'left_only').to_numpy()
+                checked = ref_only | (~in_both & col.endswith('_survey'))
+                bad |= checked & (np.abs(np.nan_to_num(np.where(ref_only, a, b))) > atol)
+        else:
+            bad |= in_both & ~((a == b) | (a.isna() & b.isna())).to_numpy()
+    return len(both), int(bad.sum()), max_diff, missing
+
+
+def check_scenario(name, scenario_path, plugin, survey, mgra2pmsa_xref, args):
+    """Load and summarize one scenario both ways, print the diff and timing report; True if anything differs."""
+    mode_labels = plugin["mode_labels"]
+    ref_trips, ref_load_ms = timed(reference_trips, args.repeat, scenario_path, plugin, mgra2pmsa_xref)
+    app_trips, app_load_ms = timed(read_model_trips, args.repeat, scenario_path, plugin, mgra2pmsa_xref)
+    dimensions = active_dimensions(app_trips, survey)
+    reference, ref_ms = timed(reference_tables, args.repeat, ref_trips, survey, dimensions, mode_labels)
+    app, app_ms = timed(app_tables, args.repeat, app_trips, survey, dimensions, mode_labels)
+
+    print(f"\n{name}")
+    print(f"{'table':<34} {'rows':>6} {'diffs':>6} {'max |diff|':>11}")
+    failed = len(ref_trips) != len(app_trips)
+    for key, (ref, keys) in reference.items():
+        rows, diffs, max_diff, missing = diff_table(ref, app[key][0], keys, args.rtol, args.atol)
+        status = "OK" if not diffs and not missing else "DIFF"
+        note = f"  columns in one output only: {', '.join(missing)}" if missing else ""
+        print(f"{key:<34} {rows:>6} {diffs:>6} {max_diff:>11.2e}  {status}{note}")
+        failed |= status != "OK"
+
+    memory = [trips.memory_usage(deep=True).sum() / 2**20 for trips in (ref_trips, app_trips)]
+    print(f"{'':<34} {'reference':>11} {'app':>11}")
+    print(f"{'loaded trips':<34} {len(ref_trips):>11,} {len(app_trips):>11,}"
+          f"{'' if len(ref_trips) == len(app_trips) else '  DIFF'}")
+    print(f"{'loaded trips (MB)':<34} {memory[0]:>11.0f} {memory[1]:>11.0f}")
+    print(f"{'load (ms)':<34} {ref_load_ms:>11.0f} {app_load_ms:>11.0f}   {ref_load_ms / app_load_ms:.1f}x faster")
+    print(f"{'summarize (ms)':<34} {ref_ms:>11.0f} {app_ms:>11.0f}   {ref_ms / app_ms:.1f}x faster")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", default=[], help="scenario folder (repeatable); default: synthetic")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="model trips of the synthetic scenario")
+    parser.add_argument("--survey-rows", type=int, default=5_000, help="survey trips of the synthetic scenario")
+    parser.add_argument("--model", default="airport.SAN", help="loader plugin of the synthetic scenario")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per path (best is reported)")
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    parser.add_argument("--atol", type=float, default=1e-6)
+    args = parser.parse_args(argv)
+
+    failed = False
+    if args.scenario:
+        plugin, survey, mgra2pmsa_xref = scenario_inputs()
+        for path in args.scenario:
+            failed |= check_scenario(path, path, plugin, survey, mgra2pmsa_xref, args)
+    else:
+        plugin = get_model(args.model)
+        PIVOT_DIMENSIONS.update(SYNTHETIC_DIMENSION)
+        with tempfile.TemporaryDirectory() as folder:
+            mgra2pmsa_xref = synthetic_scenario(folder, args.rows, plugin)
+            survey = synthetic_survey(args.survey_rows, plugin)
+            failed = check_scenario(f"synthetic {plugin['name']} ({args.rows:,} trips)", folder, plugin, survey, mgra2pmsa_xref, args)
+
+    print("\nFAIL: summary tables differ" if failed else "\nOK: all summary tables match")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
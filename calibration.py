@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+
+# === Calibration constant suggestions ===
+# per (scenario, frame key): suggestions; dropped with invalidate_suggestions when a scenario is (re)loaded
+_suggestion_cache = {}
+
+SUGGESTION_COLUMNS = ['scenario', 'segment', 'alternative', 'trip_pct_model', 'trip_pct_survey',
+                      'share_ratio', 'asc_adjustment', 'within_survey_ci']
+
+
+def suggest_constants(merged, segment_col, aggregator):
+    """
+    Suggested alternative-specific constant adjustments, ln(survey share / model share).
+
+    merged is a merge_df* frame (or several stacked frames carrying a 'scenario' column);
+    the adjustment is computed for all rows at once. Cells where either share is zero
+    get no adjustment. within_survey_ci is True when the model share already lies
+    inside the survey bootstrap interval, and None (unknown) without an interval or model share.
+    """
+    model_pct = merged['trip_pct_model'].to_numpy(dtype=np.float64)
+    survey_pct = merged['trip_pct_survey'].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = survey_pct / model_pct
+        adjustment = np.log(ratio)
+    valid = (model_pct > 0) & (survey_pct > 0)
+    ratio[~valid] = np.nan
+    adjustment[~valid] = np.nan
+
+    within_ci = np.full(len(merged), None, dtype=object)
+    if 'trip_pct_survey_lo' in merged:
+        lo = merged['trip_pct_survey_lo'].to_numpy(dtype=np.float64)
+        hi = merged['trip_pct_survey_hi'].to_numpy(dtype=np.float64)
+        known = ~(np.isnan(model_pct) | np.isnan(lo) | np.isnan(hi))
+        within_ci[known] = (model_pct[known] >= lo[known]) & (model_pct[known] <= hi[known])
+
+    return pd.DataFrame({
+        'scenario': merged['scenario'].to_numpy() if 'scenario' in merged else None,
+        'segment': merged[segment_col].to_numpy(),
+        'alternative': merged[aggregator].to_numpy(),
+        'trip_pct_model': model_pct,
+        'trip_pct_survey': survey_pct,
+        'share_ratio': ratio,
+        'asc_adjustment': adjustment,
+        'within_survey_ci': within_ci,
+    }, columns=SUGGESTION_COLUMNS)
+
+
+def constant_suggestions(santrips_dict, df_key, segment_col, aggregator):
+    """
+    Suggestions for every scenario in santrips_dict from its df_key frame.
+
+    Results are cached per scenario; only scenarios without cached suggestions (newly loaded,
+    or dropped with invalidate_suggestions on reload) are computed, in a single vectorized pass.
+    Scenarios without a df_key frame (trips lacking a pivot dimension's column) are left out.
+    """
+    scenarios = [s for s, data in santrips_dict.items() if df_key in data]
+    stale = [s for s in scenarios if (s, df_key) not in _suggestion_cache]
+
+    if stale:
+        stacked = pd.concat(
+            [santrips_dict[s][df_key].assign(scenario=s) for s in stale], ignore_index=True)
+        suggestions = suggest_constants(stacked, segment_col, aggregator)
+        by_scenario = dict(list(suggestions.groupby('scenario', sort=False)))
+        for scenario in stale:
+            rows = by_scenario.get(scenario, suggestions.iloc[0:0])
+            _suggestion_cache[(scenario, df_key)] = rows.reset_index(drop=True)
+
+    if not scenarios:
+        return pd.DataFrame(columns=SUGGESTION_COLUMNS)
+    return pd.concat([_suggestion_cache[(s, df_key)] for s in scenarios], ignore_index=True)
+
+
+def invalidate_suggestions(scenario=None):
+    """Drop cached suggestions for one scenario, or all scenarios when scenario is None."""
+    for key in list(_suggestion_cache):
+        if scenario is None or key[0] == scenario:
+            del _suggestion_cache[key]
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from config import CACHE_DIR, read_metadata, metadata_path
+
+
+# === Scenario catalog ===
+INDEX_PATH = os.path.join(CACHE_DIR, "scenario_index.sqlite")
+SCAN_WORKERS = 16
+
+
+def normalize_path(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _is_scenario(path, required_files=()):
+    return os.path.isdir(os.path.join(path, "output")) and all(
+        os.path.isfile(os.path.join(path, f)) for f in required_files)
+
+
+def _scenario_dirs(root, required_files=()):
+    """
+    The root itself if it is a scenario (has an output folder), otherwise its scenario subfolders;
+    folders missing any of required_files are left out.
+    """
+    if os.path.isdir(os.path.join(root, "output")):
+        return [root] if _is_scenario(root, required_files) else []
+    try:
+        with os.scandir(root) as entries:
+            return [e.path for e in entries if e.is_dir() and _is_scenario(e.path, required_files)]
+    except OSError as e:
+        print(f"⚠️ Cannot scan scenario root {root}: {e}")
+        return []
+
+
+def file_fingerprint(scenario_path, tracked_files=()):
+    """(modified time, size) of the metadata file and tracked output files, as a JSON string."""
+    parts = []
+    for path in [metadata_path(scenario_path)] + [os.path.join(scenario_path, f) for f in tracked_files]:
+        try:
+            st = os.stat(path)
+            parts.append([os.path.relpath(path, scenario_path), st.st_mtime_ns, st.st_size])
+        except OSError:
+            parts.append([os.path.relpath(path, scenario_path), None, None])
+    return json.dumps(parts)
+
+
+def _open_index(index_path):
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(index_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scenarios (
+            path TEXT PRIMARY KEY,
+            root TEXT,
+            scenario_id INTEGER,
+            scenario_name TEXT,
+            scenario_yr INTEGER,
+            fingerprint TEXT,
+            scanned_at REAL
+        )""")
+    return conn
+
+
+def scan_scenarios(roots, tracked_files=(), index_path=INDEX_PATH, max_workers=SCAN_WORKERS):
+    """
+    Scenario entries (dicts of path, root, scenario_id, scenario_name, scenario_yr) found under roots.
+    Only scenarios that have every tracked file (e.g. the selected model's trip and tour tables) are listed.
+
+    Roots and scenario folders are stat-ed in parallel. Metadata is cached in a SQLite index
+    together with a fingerprint of the metadata and tracked files, and is only re-read for
+    scenarios whose fingerprint changed. Index rows of scenarios no longer on disk are removed.
+    """
+    roots = [normalize_path(r) for r in roots]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        found = [(root, normalize_path(path))
+                 for root, paths in zip(roots, pool.map(lambda r: _scenario_dirs(r, tracked_files), roots))
+                 for path in paths]
+        paths = [path for _, path in found]
+        fingerprints = list(pool.map(lambda p: file_fingerprint(p, tracked_files), paths))
+
+        conn = _open_index(index_path)
+        with conn:
+            cached = {row[0]: row for row in conn.execute(
+                "SELECT path, root, scenario_id, scenario_name, scenario_yr, fingerprint FROM scenarios")}
+            stale = [(root, path, fp) for (root, path), fp in zip(found, fingerprints)
+                     if path not in cached or cached[path][5] != fp]
+            metas = list(pool.map(read_metadata, [path for _, path, _ in stale]))
+
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO scenarios VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(path, root, meta["scenario_id"], meta["scenario_name"], meta["scenario_yr"], fp, now)
+                 for (root, path, fp), meta in zip(stale, metas)])
+            found_paths = set(paths)
+            gone = [path for path, row in cached.items() if row[1] in roots and path not in found_paths]
+            conn.executemany("DELETE FROM scenarios WHERE path = ?", [(p,) for p in gone])
+
+            rows = [row for row in conn.execute(
+                "SELECT path, root, scenario_id, scenario_name, scenario_yr FROM scenarios ORDER BY scenario_id, path")
+                if row[0] in found_paths]
+        conn.close()
+
+    print(f"Scenario catalog: {len(rows)} scenarios under {len(roots)} root(s), {len(stale)} (re)indexed")
+    return [dict(zip(("path", "root", "scenario_id", "scenario_name", "scenario_yr"), row)) for row in rows]
+
+
+def id_collisions(entries):
+    """{scenario_id: [paths]} for ids used by more than one scenario (e.g. the 999 fallback for missing metadata)."""
+    by_id = {}
+    for entry in entries:
+        by_id.setdefault(entry["scenario_id"], []).append(entry["path"])
+    return {scenario_id: paths for scenario_id, paths in by_id.items() if len(paths) > 1}
+
+
+def scenario_labels(entries):
+    """Unique dropdown label per path: 'id: name', with the folder name (or full path) added where ids collide."""
+    collisions = id_collisions(entries)
+    labels, used = {}, set()
+    for entry in entries:
+        label = f"{entry['scenario_id']}: {entry['scenario_name']}"
+        if entry["scenario_id"] in collisions:
+            label += f" [{os.path.basename(os.path.normpath(entry['path']))}]"
+        if label in used:
+            label += f" [{entry['path']}]"
+        labels[entry["path"]] = label
+        used.add(label)
+    return labels
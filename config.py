@@ -1,13 +1,27 @@
 import os
 import yaml
 import pandas as pd
+from pandas.api.types import union_categoricals
 from pathlib import Path
-from databricks import sql
-from databricks.sdk.core import Config, oauth_service_principal
+from model_plugins import get_model
+from summaries import relabel
 
 import warnings
 warnings.filterwarnings("ignore")
 
+# Local cache for derived data (survey intervals, scenario index)
+CACHE_DIR = ".calibviz_cache"
+
+# Trip attribute dimensions summarized by the pivot engine (pivot.py) and listed in the sidebar next to
+# "Trip Mode Choice" and "Destination Choice". model_col is kept from the model's trip file (or its tour file);
+# survey_col is read from the survey table after the plugin's survey_columns rename, or None where no survey
+# column has been checked against the survey extract: the dimension is then charted for the model only.
+# The app lists a dimension only when the loaded model trips carry its model_col.
+PIVOT_DIMENSIONS = {
+    # departure period of the trip (the depart column of the ActivitySim trip files); not in the SAN survey extract
+    "depart": {"label": "Departure Period", "model_col": "depart", "survey_col": None},
+}
+
 # === Utility functions ===
 # Configure Azure Databricks connection
 server_hostname = os.getenv("DATABRICKS_SERVER_HOSTNAME_DEV_WESTUS")
@@ -17,7 +31,10 @@ http_path = os.getenv("DATABRICKS_HTTP_PATH_DEV_WESTUS")
 
 user_agent_entry = os.getenv("DATABRICKS_HTTP_PATH_DEV_WESTUS")
 
+# The Databricks SDK and SQL connector are imported on first connection; the SDK alone
+# costs most of a second at startup
 def credential_provider():
+  from databricks.sdk.core import Config, oauth_service_principal
   config = Config(
     host          = f"https://{server_hostname}",
     client_id     = client_id,
@@ -25,6 +42,7 @@ def credential_provider():
   return oauth_service_principal(config)
 
 def get_connection(user):
+        from databricks import sql
         return sql.connect(
                 server_hostname      = server_hostname,
                 http_path            = http_path,
@@ -38,46 +56,137 @@ def read_table(query, conn):
         return cursor.fetchall_arrow().to_pandas()
 
 # Read scenario metadata
+def metadata_path(scenario_path):
+    return os.path.join(scenario_path, "output", "datalake_metadata.yaml")
+
 def read_metadata(scenario_path):
-    meta_path = os.path.join(scenario_path, r"output\datalake_metadata.yaml")
+    meta_path = metadata_path(scenario_path)
     scenario_name = os.path.basename(scenario_path)
+    defaults = {
+        "scenario_id": 999,
+        "scenario_name": scenario_name,
+        "scenario_yr": 2022
+    }
     if not Path(meta_path).exists():
         print(f"⚠️ Metadata file missing in {scenario_path}, assigning default scenario_id=999 and name='{scenario_name}'")
-        return {
-            "scenario_id": 999,
-            "scenario_name": scenario_name,
-            "scenario_yr": 2022
-        }
-    else:
+        return defaults
+    try:
         with open(meta_path, "r") as f:
             meta = yaml.safe_load(f)
-    return {
-        "scenario_id": int(meta.get("scenario_id")),
-        "scenario_name": meta.get("scenario_title"),
-        "scenario_yr": int(meta.get("scenario_year"))
-    }
+    except (OSError, yaml.YAMLError) as e:
+        print(f"⚠️ Metadata file in {scenario_path} cannot be read ({e}), assigning default scenario_id=999 and name='{scenario_name}'")
+        return defaults
+
+    # a half-written or hand-edited file may lack fields; those take the defaults
+    meta = meta if isinstance(meta, dict) else {}
+    fields = {"scenario_id": ("scenario_id", int), "scenario_name": ("scenario_title", str), "scenario_yr": ("scenario_year", int)}
+    result, missing = dict(defaults), []
+    for key, (field, cast) in fields.items():
+        try:
+            result[key] = cast(meta[field])
+        except (KeyError, TypeError, ValueError):
+            missing.append(field)
+    if missing:
+        print(f"⚠️ Metadata file in {scenario_path} has no valid {', '.join(missing)}, using defaults for them")
+    return result
 
     
 # === Load data ===
 # Survey data
-def load_survey_data(user):
+def load_survey_data(user, plugin, survey_path=None):
+     query = f"SELECT * FROM read_files('{survey_path}')" if survey_path else plugin["survey_query"]
+     if query is None:
+          raise ValueError(f"No survey query is configured for model '{plugin['name']}'; set SURVEY_PATH in .env")
      conn = get_connection(user)
-     sd1 = read_table(f"""SELECT * FROM read_files('/Volumes/survey/sdia25/calibration/departing_trips_by_mode.csv')""", conn).drop('_rescued_data', axis=1)
-     sd1 = sd1.rename(columns={'airport_access_mode':'arrival_mode', 'respondent_type':'primary_purpose', 'inbound_bool':'inbound', 'person_trips':'weight_person_trip'})
-     
-     # Temporarily replace origin_pmsa value 99 with 8 and update its label to "EAST COUNTY"
-     sd1.loc[sd1['origin_pmsa'] == 99, 'origin_pmsa'] = 8
-     sd1.loc[sd1['origin_pmsa'] == 8, 'origin_pmsa_label'] = "EAST_COUNTY"
+     sd1 = read_table(query, conn).rename(columns=plugin["survey_columns"])
+
+     # survey-specific cleanup declared by the plugin
+     if plugin["survey_prepare"]:
+          sd1 = plugin["survey_prepare"](sd1)
 
      return {
             "santrips": sd1,
         }
 
 # Model data
+# columns of the loaded trip table; text columns are stored as categoricals
+MODEL_TRIP_COLUMNS = ['origin_mgra','origin_pmsa','trip_mode','arrival_mode','tour_type','outbound','weight_person_trip']
+MODEL_CATEGORY_COLUMNS = ['trip_mode','arrival_mode','tour_type']
+
+def concat_categorical_chunks(chunks, columns):
+    # give every chunk the same (sorted) categories so the concatenated columns stay categorical
+    for col in columns:
+        categories = union_categoricals([chunk[col] for chunk in chunks], sort_categories=True).categories
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+def read_model_trips(scenario_path, plugin, mgra2pmsa_xref):
+    """
+    Trip table of one scenario in the app's columns, read as the plugin declares.
+
+    Only mapped columns are read, in chunks of plugin['chunk_rows']. Each chunk is joined to its tour
+    attributes, filtered and recoded before the next is read, and text columns are kept as categoricals,
+    so memory follows the filtered, coded table rather than the raw file.
+    """
+    folder = os.path.join(scenario_path, "output", plugin["output_dir"])
+    trip_path = os.path.join(folder, plugin["trip_file"])
+    tour_path = os.path.join(folder, plugin["tour_file"])
+    trip_header = pd.read_csv(trip_path, nrows=0).columns
+    tour_header = pd.read_csv(tour_path, nrows=0).columns
+
+    # pivot dimensions come from the trip file, or from the tour file when trips do not carry them
+    trip_columns = dict(plugin["trip_columns"])
+    tour_columns = dict(plugin["tour_columns"])
+    pivot_cols = [d['model_col'] for d in PIVOT_DIMENSIONS.values() if d['model_col'] not in MODEL_TRIP_COLUMNS]
+    for col in pivot_cols:
+        if col in trip_header:
+            trip_columns.setdefault(col, col)
+        elif col in tour_header:
+            tour_columns.setdefault(col, col)
+    out_cols = MODEL_TRIP_COLUMNS + [c for c in pivot_cols if c in trip_columns or c in tour_columns]
+
+    # the tour table is read whole, so its text columns are read straight into categoricals
+    tour_text = {src: 'category' for col, src in tour_columns.items() if col in MODEL_CATEGORY_COLUMNS}
+    tours = pd.read_csv(tour_path, usecols=['tour_id'] + list(dict.fromkeys(tour_columns.values())), dtype=tour_text)
+    tours = pd.DataFrame({col: tours[src] for col, src in tour_columns.items()}).set_index(tours['tour_id'])
+    pmsa_by_mgra = mgra2pmsa_xref.drop_duplicates('mgra').set_index('mgra')['origin_pmsa']
+
+    chunks = []
+    for raw in pd.read_csv(trip_path, usecols=list(dict.fromkeys(trip_columns.values())), chunksize=plugin["chunk_rows"]):
+        chunk = pd.DataFrame({col: raw[src] for col, src in trip_columns.items()})
+        chunk = chunk.join(tours, on='tour_id', how='inner')
+        chunk['origin_pmsa'] = chunk['origin_mgra'].map(pmsa_by_mgra)
+        if plugin["trip_filter"]:
+            chunk = chunk.query(plugin["trip_filter"]).copy()
+
+        # map model tour types to survey types, fix model-specific codes and map model modes to survey modes
+        chunk['tour_type'] = relabel(chunk['tour_type'], plugin["tour_types"])
+        if plugin["prepare"]:
+            chunk = plugin["prepare"](chunk)
+        chunk['arrival_mode'] = chunk['arrival_mode'].replace(plugin["arrival_modes"])
+
+        # store text columns and pivot dimensions as categoricals so each costs one small code column
+        chunk = chunk[out_cols]
+        for col in MODEL_CATEGORY_COLUMNS + pivot_cols:
+            if col in chunk:
+                chunk[col] = chunk[col].astype('category').cat.remove_unused_categories()
+        chunks.append(chunk)
+
+    # drop chunks emptied by the filter (keeping one, for the columns), their categories have no dtype
+    chunks = [chunk for chunk in chunks if len(chunk)] or chunks[:1]
+    return concat_categorical_chunks(chunks, [c for c in MODEL_CATEGORY_COLUMNS + pivot_cols if c in out_cols])
+
+# Geo crosswalk of model origins (mgra) to pmsa
+def load_pmsa_xref(conn):
+    return read_table(f"""SELECT * FROM tam.geo.mgra15_taz15_pmsa_xref""", conn).rename(columns={'MGRA':'mgra','TAZ':'taz','PSEUDOMSA':'origin_pmsa'})
+
 def load_model_data(scenario_dict, selected_model, env, user):
+    plugin = get_model(selected_model)
+
     # load geo crosswalk
     conn = get_connection(user)
-    mgra2pmsa_xref = read_table(f"""SELECT * FROM tam.geo.mgra15_taz15_pmsa_xref""", conn).rename(columns={'MGRA':'mgra','TAZ':'taz','PSEUDOMSA':'origin_pmsa'})
+    mgra2pmsa_xref = load_pmsa_xref(conn)
 
     if env == "Local":
         for scenario_path in scenario_dict.keys():
@@ -86,77 +195,8 @@ def load_model_data(scenario_dict, selected_model, env, user):
             # load scenario metadata
             scenario_meta = read_metadata(scenario_path)
 
-            # load model data and get trip tour type and origin pmsa
-            sdia_trip = pd.read_csv(os.path.join(scenario_path, r"output\airport.SAN\final_santrips.csv")).rename(columns={'origin':'origin_mgra'})
-            sdia_tour = pd.read_csv(os.path.join(scenario_path, r"output\airport.SAN\final_santours.csv"))[['tour_id','tour_type']]
-            sdia_trip = sdia_trip.merge(mgra2pmsa_xref, left_on='origin_mgra', right_on='mgra', how='left')
-            df1 = sdia_trip.merge(sdia_tour, on='tour_id')[['origin_mgra','origin_pmsa','trip_mode','arrival_mode','tour_type','outbound','weight_person_trip']]
-            
-            """
-            09/18/2025 -jyen
-            In the airport model output trip files, inbound trips are defined as SAN-to-nonairport trips, and outbound trips as nonairport-to-SAN trips.
-            However, in SANDAG’s modeling practice, these definitions are reversed: inbound trips are considered nonairport-to-SAN, and outbound trips are SAN-to-nonairport.
-
-            To maintain consistency with SANDAG practice, we are temporarily using outbound == True to subset inbound trips (i.e., nonairport-to-SAN) from the airport model output trip files.
-            A final decision is still pending on whether to revise the inbound and outbound fields in the airport model output trip files to fully align with SANDAG’s modeling practice.
-            """
-            df1 = df1.query("outbound == True and tour_type != 'external'")  # constrain to inbound and non-external trips only, given the absence of outbound and external trips in the survey data
-
-            # map model tour types to survey types
-            tour_types_mapping = {
-                                    'vis_per':'vis_nb',
-                                    'vis_bus':'vis_bus',
-                                    'emp':'emp',
-                                    'res_per1':'res_nb',
-                                    'res_per2':'res_nb',
-                                    'res_per3':'res_nb',
-                                    'res_per4':'res_nb',
-                                    'res_per5':'res_nb',
-                                    'res_per6':'res_nb',
-                                    'res_per7':'res_nb',
-                                    'res_per8':'res_nb',
-                                    'res_bus1':'res_bus',
-                                    'res_bus2':'res_bus',
-                                    'res_bus3':'res_bus',
-                                    'res_bus4':'res_bus',
-                                    'res_bus5':'res_bus',
-                                    'res_bus6':'res_bus',
-                                    'res_bus7':'res_bus',
-                                    'res_bus8':'res_bus'
-                                }
-            df1['tour_type'] = df1['tour_type'].replace(tour_types_mapping)
-
-            # match model airport trip modes to arrival modes
-            df1.loc[df1['arrival_mode']=='TAXI_LOC1', "trip_mode"] = "TAXI"
-            df1.loc[(df1['arrival_mode']=='RIDEHAIL_LOC1') 
-                    & (df1['trip_mode']== "SHARED2"), "trip_mode"] = "TNC_SINGLE"
-            df1.loc[(df1['arrival_mode']=='RIDEHAIL_LOC1') 
-                    & (df1['trip_mode']== "SHARED3"), "trip_mode"] = "TNC_SHARED"
-
-            # map model arrival modes to survey modes
-            arrival_mode_mapping = {
-                                    'CURB_LOC1': 'drop_off',
-                                    'HOTEL_COURTESY': 'shuttle',
-                                    'KNR_LOC': 'public_transit',
-                                    'KNR_MIX': 'public_transit',
-                                    'KNR_PRM': 'public_transit',
-                                    'PARK_ESCORT': 'drop_off',
-                                    'PARK_LOC1': 'parked_on_site',
-                                    'PARK_LOC4': 'parked_off_site',
-                                    'PARK_LOC5': 'parked_off_site',
-                                    'RENTAL': 'rental_car',
-                                    'TAXI_LOC1':'taxi',
-                                    'RIDEHAIL_LOC1':'tnc',
-                                    'SHUTTLEVAN': 'shuttle',
-                                    'TNC_LOC': 'public_transit',
-                                    'TNC_MIX': 'public_transit',
-                                    'TNC_PRM': 'public_transit',
-                                    'WALK': 'active_transportation',
-                                    'WALK_LOC': 'public_transit',
-                                    'WALK_MIX': 'public_transit',
-                                    'WALK_PRM': 'public_transit'
-                                    }
-            df1['arrival_mode'] = df1['arrival_mode'].replace(arrival_mode_mapping)
+            # load model trips with their tour type and origin pmsa
+            df1 = read_model_trips(scenario_path, plugin, mgra2pmsa_xref)
 
             # update scenario dictionary with metadata and loaded data
             scenario_dict[scenario_path]['metadata'] = scenario_meta
@@ -0,0 +1,142 @@
+import re
+import zipfile
+import tempfile
+
+
+# === Bulk export of summary tables ===
+# format -> (mimetype, file extension of the download, file extension of each table)
+EXPORT_FORMATS = {
+    "csv": ("application/zip", "zip", "csv"),
+    "parquet": ("application/zip", "zip", "parquet"),
+    "arrow": ("application/zip", "zip", "arrow"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx", None),
+}
+EXPORT_CHUNK_ROWS = 50000   # rows serialized per write
+EXPORT_READ_BYTES = 1 << 20  # bytes yielded per chunk when streaming a spooled file
+
+
+class _StreamBuffer:
+    """Write-only file object; the export generator drains it after every write."""
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _safe_name(name):
+    return re.sub(r"[^\w.-]+", "_", str(name)).strip("_")
+
+
+def iter_tables(load_scenario, scenarios):
+    """
+    Yield (scenario, table key, DataFrame) for every merge_df* table of the selected scenarios.
+
+    Each scenario is loaded with load_scenario (tables dict, or None if it fails) only when the export
+    reaches it, so earlier scenarios are already streamed; scenarios that fail to load are skipped.
+    """
+    for scenario in scenarios:
+        tables = load_scenario(scenario)
+        if tables is None:
+            print(f"⚠️ Scenario {scenario} could not be loaded and is left out of the export")
+            continue
+        for key, df in tables.items():
+            if key.startswith("merge_df"):
+                yield scenario, key, df
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _write_table(handle, df, fmt, chunk_rows):
+    # generator: writes one table into handle chunk by chunk, yielding after each chunk
+    if fmt == "csv":
+        for i, chunk in enumerate(_chunks(df, chunk_rows)):
+            handle.write(chunk.to_csv(index=False, header=(i == 0)).encode("utf-8"))
+            yield
+        return
+
+    import pyarrow as pa
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(handle, schema)
+    else:
+        writer = pa.ipc.new_file(handle, schema)
+    for chunk in _chunks(df, chunk_rows):
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        yield
+    writer.close()
+
+
+def _stream_zip(tables, fmt, chunk_rows):
+    buffer = _StreamBuffer()
+    extension = EXPORT_FORMATS[fmt][2]
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for scenario, key, df in tables:
+            with zf.open(f"{_safe_name(scenario)}/{key}.{extension}", "w") as handle:
+                for _ in _write_table(handle, df, fmt, chunk_rows):
+                    yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _stream_excel(tables, chunk_rows):
+    from openpyxl import Workbook
+
+    # write-only workbook keeps rows on disk; sheet names are limited to 31 characters,
+    # so tables go on numbered sheets listed on the first "index" sheet
+    wb = Workbook(write_only=True)
+    index = wb.create_sheet("index")
+    index.append(["sheet", "scenario", "table"])
+    for i, (scenario, key, df) in enumerate(tables, start=1):
+        sheet_name = f"{i}_{key}"[:31]
+        index.append([sheet_name, scenario, key])
+        ws = wb.create_sheet(sheet_name)
+        ws.append([str(c) for c in df.columns])
+        for chunk in _chunks(df, chunk_rows):
+            for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+                ws.append(list(row))
+
+    with tempfile.TemporaryFile() as f:
+        wb.save(f)
+        f.seek(0)
+        while True:
+            data = f.read(EXPORT_READ_BYTES)
+            if not data:
+                break
+            yield data
+
+
+def stream_export(tables, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Generator of the export file's bytes for (scenario, key, DataFrame) tables.
+
+    csv, parquet and arrow produce a zip archive with one file per scenario and table,
+    written and handed back chunk by chunk. xlsx produces a single workbook with one
+    sheet per scenario and table; a workbook is only readable once complete, so its
+    bytes are sent after every table is written.
+    """
+    if fmt == "xlsx":
+        stream = _stream_excel(tables, chunk_rows)
+    else:
+        stream = _stream_zip(tables, fmt, chunk_rows)
+    for data in stream:
+        if data:
+            yield data
+
+
+def export_filename(scenarios, fmt):
+    stem = _safe_name(scenarios[0]) if len(scenarios) == 1 else f"calibviz_{len(scenarios)}_scenarios"
+    return f"{stem}_summary.{EXPORT_FORMATS[fmt][1]}"
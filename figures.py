@@ -0,0 +1,92 @@
+import numpy as np
+import plotly.graph_objects as go
+from dash import Patch
+from pivot import category_sort_key
+
+
+# === Survey vs. model bar charts ===
+bar_color_sequence = ["#ff7f0e","#4461e2"]  # survey vs. model
+
+# prebuilt figure per (mode, page): layout and the two empty traces, copied for each full render
+_bar_templates = {}
+BAR_DECIMALS = 4    # plotted values are rounded; full float precision roughly doubles the JSON payload
+
+
+def empty_fig(title: str = ""):
+    return go.Figure(layout={"title": {"text": title}})
+
+
+def bar_categories(df, aggregator_col, cat_order=None):
+    """
+    Fixed x categories for a chart: cat_order (plus any value it misses), or the sorted values of the column.
+    Every tour type of a (scenario, mode) is drawn on the same categories, so switching tour type only changes y.
+    """
+    values = df[aggregator_col].dropna().unique().tolist()
+    if cat_order:
+        return list(cat_order) + [v for v in values if v not in cat_order]
+    return sorted(values, key=category_sort_key)
+
+
+def _bar_template(mode, page, aggregator_col):
+    if (mode, page) not in _bar_templates:
+        fig = go.Figure(
+            [go.Bar(marker_color=color, legendgroup=str(i), offsetgroup=str(i), orientation="v", textposition="auto")
+             for i, color in enumerate(bar_color_sequence)]
+        )
+        fig.update_layout(
+            barmode="group",
+            legend={"title": {"text": "Source"}, "tracegroupgap": 0},
+            xaxis={"title": {"text": aggregator_col}, "type": "category", "categoryorder": "array"},
+            margin={"t": 60},
+        )
+        _bar_templates[(mode, page)] = fig
+    return go.Figure(_bar_templates[(mode, page)])
+
+
+def _bar_values(filtered, aggregator_col, categories, value_vars):
+    """y arrays of the survey and model series aligned to categories, plus survey error arrays (or None)."""
+    aligned = filtered.drop_duplicates(aggregator_col).set_index(aggregator_col).reindex(categories)
+    ys = [aligned[v].to_numpy(dtype=float) for v in value_vars]
+
+    # survey confidence interval, percentages only
+    errors = None
+    if value_vars[0] == "trip_pct_survey" and "trip_pct_survey_lo" in aligned:
+        errors = (np.round(aligned["trip_pct_survey_hi"].to_numpy(dtype=float) - ys[0], BAR_DECIMALS),
+                  np.round(ys[0] - aligned["trip_pct_survey_lo"].to_numpy(dtype=float), BAR_DECIMALS))
+    return [np.round(y, BAR_DECIMALS) for y in ys], errors
+
+
+def bar_figure(mode, page, filtered, aggregator_col, categories, value_vars, y_label, title):
+    """Full survey vs. model grouped bar figure, built from the (mode, page) template."""
+    ys, errors = _bar_values(filtered, aggregator_col, categories, value_vars)
+    fig = _bar_template(mode, page, aggregator_col)
+    for trace, name, y in zip(fig.data, value_vars, ys):
+        trace.update(
+            name=name, x=categories, y=y,
+            hovertemplate=f"Source={name}<br>{aggregator_col}=%{{x}}<br>{y_label}=%{{y}}<extra></extra>",
+        )
+    if errors is not None:
+        fig.data[0].error_y = {"type": "data", "array": errors[0], "arrayminus": errors[1], "symmetric": False}
+    fig.update_layout(
+        title={"text": title},
+        xaxis={"categoryarray": categories},
+        yaxis={"title": {"text": y_label}},
+    )
+    return fig
+
+
+def bar_patch(filtered, aggregator_col, categories, value_vars, title):
+    """Partial update of a figure from bar_figure with the same categories and value_vars: y arrays, error bars and title."""
+    ys, errors = _bar_values(filtered, aggregator_col, categories, value_vars)
+    patch = Patch()
+    for i, y in enumerate(ys):
+        patch["data"][i]["y"] = _json_list(y)
+    if errors is not None:
+        patch["data"][0]["error_y"]["array"] = _json_list(errors[0])
+        patch["data"][0]["error_y"]["arrayminus"] = _json_list(errors[1])
+    patch["layout"]["title"]["text"] = title
+    return patch
+
+
+def _json_list(values):
+    return [None if np.isnan(v) else v for v in values.tolist()]
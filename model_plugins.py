@@ -0,0 +1,226 @@
+import os
+
+
+# === Model loader plugins ===
+# One plugin per ABM3 sub-model, selected with SELECTED_MODEL in .env. A plugin is a dict that declares:
+#   output_dir                 folder under <scenario>/output holding the model's trip and tour files
+#   trip_file, tour_file       trip and tour tables (CSV)
+#   trip_columns               {app column: trip file column}; one file column may feed several app columns
+#   tour_columns               {app column: tour file column}, joined to trips on tour_id
+#   trip_filter                pandas query applied to every chunk before recoding, or None
+#   tour_types                 model tour type -> survey tour type
+#   arrival_modes              model mode code -> survey mode code
+#   prepare                    optional function(df) run on every chunk before arrival_modes is applied
+#   mode_labels, mode_order    survey mode code -> chart label, and the x axis order of the labels
+#   survey_query               Databricks query of the survey extract (None: set SURVEY_PATH in .env)
+#   survey_columns             survey column -> app column
+#   survey_prepare             optional function(df) run on the survey table after survey_columns is applied
+#   summary_title              header of the summary card
+#   chunk_rows                 trip rows read per chunk
+MODEL_PLUGINS = {}
+
+DEFAULT_PLUGIN = {
+    "tour_file": "final_tours.csv",
+    "trip_file": "final_trips.csv",
+    "trip_columns": {
+        "tour_id": "tour_id",
+        "origin_mgra": "origin",
+        "trip_mode": "trip_mode",
+        "arrival_mode": "trip_mode",
+        "outbound": "outbound",
+        "weight_person_trip": "weight_person_trip",
+    },
+    "tour_columns": {"tour_type": "tour_type"},
+    "trip_filter": None,
+    "tour_types": {},
+    "arrival_modes": {},
+    "prepare": None,
+    "survey_query": None,
+    "survey_columns": {"person_trips": "weight_person_trip"},
+    "survey_prepare": None,
+    "summary_title": "Trip Summary by Market Segment",
+    "chunk_rows": 1_000_000,
+}
+
+
+def register_model(name, **spec):
+    """Add a loader plugin; fields not given are taken from DEFAULT_PLUGIN."""
+    MODEL_PLUGINS[name] = dict(DEFAULT_PLUGIN, name=name, output_dir=name, **spec)
+    return MODEL_PLUGINS[name]
+
+
+def get_model(name):
+    if name not in MODEL_PLUGINS:
+        raise ValueError(f"SELECTED_MODEL '{name}' has no loader plugin; available models: {', '.join(MODEL_PLUGINS)}")
+    return MODEL_PLUGINS[name]
+
+
+def model_files(plugin):
+    """Trip and tour file paths of a plugin, relative to the scenario folder."""
+    return [os.path.join("output", plugin["output_dir"], plugin["trip_file"]),
+            os.path.join("output", plugin["output_dir"], plugin["tour_file"])]
+
+
+# --- Airport models (SAN and CBX) ---
+# map model and survey arrival mode to WSP mode split
+ARRIVAL_MODE_TO_WSP = {
+        "drop_off": "Drop-off/Pick up",
+        "shuttle": "Shared Shuttle Van",
+        "public_transit": "Public Transportation",
+        "park_escort": "Drop-off/Pick up",
+        "parked_on_site":"Personal Car Parked",
+        "parked_off_site":"Personal Car Parked",
+        'parked_employee':"Personal Car Parked",
+        'parked_unknown':"Personal Car Parked",
+        "rental_car":"Rental Car",
+        "tnc":"UBER/Lyft",
+        "taxi":"Taxi",
+        "active_transportation":"Walk"
+}
+
+WSP_ORDER = [
+    'Drop-off/Pick up', 'UBER/Lyft', 'Taxi', 'Personal Car Parked',
+    'Shared Shuttle Van', 'Rental Car', 'Walk', 'Public Transportation'
+]
+
+# map model tour types to survey types
+AIRPORT_TOUR_TYPES = {
+                        'vis_per':'vis_nb',
+                        'vis_bus':'vis_bus',
+                        'emp':'emp',
+                        'res_per1':'res_nb',
+                        'res_per2':'res_nb',
+                        'res_per3':'res_nb',
+                        'res_per4':'res_nb',
+                        'res_per5':'res_nb',
+                        'res_per6':'res_nb',
+                        'res_per7':'res_nb',
+                        'res_per8':'res_nb',
+                        'res_bus1':'res_bus',
+                        'res_bus2':'res_bus',
+                        'res_bus3':'res_bus',
+                        'res_bus4':'res_bus',
+                        'res_bus5':'res_bus',
+                        'res_bus6':'res_bus',
+                        'res_bus7':'res_bus',
+                        'res_bus8':'res_bus'
+                    }
+
+# map model arrival modes to survey modes
+AIRPORT_ARRIVAL_MODES = {
+                        'CURB_LOC1': 'drop_off',
+                        'HOTEL_COURTESY': 'shuttle',
+                        'KNR_LOC': 'public_transit',
+                        'KNR_MIX': 'public_transit',
+                        'KNR_PRM': 'public_transit',
+                        'PARK_ESCORT': 'drop_off',
+                        'PARK_LOC1': 'parked_on_site',
+                        'PARK_LOC4': 'parked_off_site',
+                        'PARK_LOC5': 'parked_off_site',
+                        'RENTAL': 'rental_car',
+                        'TAXI_LOC1':'taxi',
+                        'RIDEHAIL_LOC1':'tnc',
+                        'SHUTTLEVAN': 'shuttle',
+                        'TNC_LOC': 'public_transit',
+                        'TNC_MIX': 'public_transit',
+                        'TNC_PRM': 'public_transit',
+                        'WALK': 'active_transportation',
+                        'WALK_LOC': 'public_transit',
+                        'WALK_MIX': 'public_transit',
+                        'WALK_PRM': 'public_transit'
+                        }
+
+def match_airport_trip_modes(df):
+    # match model airport trip modes to arrival modes
+    df.loc[df['arrival_mode']=='TAXI_LOC1', "trip_mode"] = "TAXI"
+    df.loc[(df['arrival_mode']=='RIDEHAIL_LOC1')
+            & (df['trip_mode']== "SHARED2"), "trip_mode"] = "TNC_SINGLE"
+    df.loc[(df['arrival_mode']=='RIDEHAIL_LOC1')
+            & (df['trip_mode']== "SHARED3"), "trip_mode"] = "TNC_SHARED"
+    return df
+
+def prepare_airport_survey(df):
+    # drop the rescue column of the Databricks read_files extract
+    df = df.drop('_rescued_data', axis=1, errors='ignore')
+
+    # Temporarily replace origin_pmsa value 99 with 8 and update its label to "EAST COUNTY"
+    df.loc[df['origin_pmsa'] == 99, 'origin_pmsa'] = 8
+    df.loc[df['origin_pmsa'] == 8, 'origin_pmsa_label'] = "EAST_COUNTY"
+    return df
+
+"""
+09/18/2025 -jyen
+In the airport model output trip files, inbound trips are defined as SAN-to-nonairport trips, and outbound trips as nonairport-to-SAN trips.
+However, in SANDAG’s modeling practice, these definitions are reversed: inbound trips are considered nonairport-to-SAN, and outbound trips are SAN-to-nonairport.
+
+To maintain consistency with SANDAG practice, we are temporarily using outbound == True to subset inbound trips (i.e., nonairport-to-SAN) from the airport model output trip files.
+A final decision is still pending on whether to revise the inbound and outbound fields in the airport model output trip files to fully align with SANDAG’s modeling practice.
+"""
+# constrain to inbound and non-external trips only, given the absence of outbound and external trips in the survey data
+AIRPORT_TRIP_FILTER = "outbound == True and tour_type != 'external'"
+
+AIRPORT_TRIP_COLUMNS = dict(DEFAULT_PLUGIN["trip_columns"], arrival_mode="arrival_mode")
+AIRPORT_SURVEY_COLUMNS = {'airport_access_mode':'arrival_mode', 'respondent_type':'primary_purpose', 'inbound_bool':'inbound', 'person_trips':'weight_person_trip'}
+
+register_model(
+    "airport.SAN",
+    trip_file="final_santrips.csv",
+    tour_file="final_santours.csv",
+    trip_columns=AIRPORT_TRIP_COLUMNS,
+    trip_filter=AIRPORT_TRIP_FILTER,
+    tour_types=AIRPORT_TOUR_TYPES,
+    arrival_modes=AIRPORT_ARRIVAL_MODES,
+    prepare=match_airport_trip_modes,
+    mode_labels=ARRIVAL_MODE_TO_WSP,
+    mode_order=WSP_ORDER,
+    survey_query="SELECT * FROM read_files('/Volumes/survey/sdia25/calibration/departing_trips_by_mode.csv')",
+    survey_columns=AIRPORT_SURVEY_COLUMNS,
+    survey_prepare=prepare_airport_survey,
+    summary_title="Trip Summary by Departing Air Passenger Market",
+)
+
+# the CBX airport model is the same model run with CBX inputs; no CBX survey extract is published yet
+register_model(
+    "airport.CBX",
+    trip_file="final_cbxtrips.csv",
+    tour_file="final_cbxtours.csv",
+    trip_columns=AIRPORT_TRIP_COLUMNS,
+    trip_filter=AIRPORT_TRIP_FILTER,
+    tour_types=AIRPORT_TOUR_TYPES,
+    arrival_modes=AIRPORT_ARRIVAL_MODES,
+    prepare=match_airport_trip_modes,
+    mode_labels=ARRIVAL_MODE_TO_WSP,
+    mode_order=WSP_ORDER,
+    survey_columns=AIRPORT_SURVEY_COLUMNS,
+    survey_prepare=prepare_airport_survey,
+    summary_title="Trip Summary by Departing Air Passenger Market",
+)
+
+
+# --- Cross-border, visitor and resident models ---
+# trip_mode is compared directly, so it also fills the arrival_mode column used by the Trip Mode Choice pages;
+# survey extracts are expected in the calibration layout (arrival_mode, tour_type, origin_pmsa, person_trips)
+TRIP_MODE_LABELS = {
+    "DRIVEALONE": "Drive Alone",
+    "SHARED2": "Shared Ride 2",
+    "SHARED3": "Shared Ride 3+",
+    "WALK": "Walk",
+    "BIKE": "Bike",
+    "EBIKE": "E-Bike",
+    "ESCOOTER": "E-Scooter",
+    "WALK_TRANSIT": "Walk to Transit",
+    "PNR_TRANSIT": "Park and Ride to Transit",
+    "KNR_TRANSIT": "Kiss and Ride to Transit",
+    "TNC_TRANSIT": "TNC to Transit",
+    "TAXI": "Taxi",
+    "TNC_SINGLE": "TNC Single",
+    "TNC_SHARED": "TNC Shared",
+    "SCH_BUS": "School Bus",
+}
+
+for name in ("crossborder", "visitor", "resident"):
+    register_model(
+        name,
+        mode_labels=TRIP_MODE_LABELS,
+        mode_order=list(dict.fromkeys(TRIP_MODE_LABELS.values())),
+    )
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+# === Generic pivot engine ===
+def category_sort_key(value):
+    """Numbers in numeric order, then strings, so e.g. periods 1..40 are not sorted as 1, 10, 11, ..."""
+    if isinstance(value, (int, float, np.number)):
+        return (0, float(value), "")
+    return (1, 0.0, str(value))
+
+
+def category_codes(values, categories):
+    """Integer position of each value in categories; -1 for missing or unlisted values."""
+    return np.asarray(pd.Categorical(values, categories=categories).codes, dtype=np.int64)
+
+
+def weighted_crosstab(row_codes, n_rows, col_codes, n_cols, weights):
+    """Weighted (row x column) totals from integer codes in a single bincount pass."""
+    valid = (row_codes >= 0) & (col_codes >= 0)
+    flat = row_codes[valid] * n_cols + col_codes[valid]
+    totals = np.bincount(flat, weights=weights[valid], minlength=n_rows * n_cols)
+    return totals.astype(np.float64).reshape(n_rows, n_cols)  # bincount of nothing is int
+
+
+def _share_frame(totals, segments, segment_col, dimension, categories, value_col):
+    n_segments, n_categories = totals.shape
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = totals / totals.sum(axis=1, keepdims=True) * 100
+    return pd.DataFrame({
+        segment_col: np.repeat(np.asarray(segments, dtype=object), n_categories),
+        dimension: np.tile(pd.Index(categories).to_numpy(), n_segments),  # keeps int/str dtype for merges
+        value_col: totals.ravel(),
+        'trip_pct': pct.ravel(),
+    })
+
+
+def pivot_tables(trip_data, dim_col, dimension, categories, general_of, weight_col='weight_person_trip'):
+    """
+    Weighted trips of trip_data by tour type x dim_col in the layout of process_santrips.
+
+    Values are mapped to integer codes over the fixed categories and summed with one bincount,
+    so each dimension costs one pass over the trip table and no copies of it. Returns the
+    (disaggregated, general, employee) frames, with the dimension values in column `dimension`
+    and every (segment, category) cell present. A table without dim_col (or dim_col None) gives NaN trips.
+    """
+    tour_codes, tour_types = pd.factorize(trip_data['tour_type'], sort=True)
+    tour_types = np.asarray(tour_types, dtype=object)
+    n_categories = len(categories)
+    has_dim = dim_col is not None and dim_col in trip_data
+    if has_dim:
+        dim_codes = category_codes(trip_data[dim_col], categories)
+    else:
+        dim_codes = np.full(len(trip_data), -1, dtype=np.int64)
+    weights = trip_data[weight_col].to_numpy(dtype=np.float64)
+
+    by_tour = weighted_crosstab(tour_codes.astype(np.int64), len(tour_types), dim_codes, n_categories, weights)
+    if not has_dim:
+        by_tour[:] = np.nan
+
+    # employee trips are summarized separately, as with emp=True in process_santrips
+    is_emp = tour_types == 'emp'
+    tours, tour_totals = tour_types[~is_emp], by_tour[~is_emp]
+    total = tour_totals.sum(axis=0, keepdims=True)
+
+    disaggregated = _share_frame(np.vstack([tour_totals, total]), list(tours) + ['Total'],
+                                 'tour_type', dimension, categories, 'trip')
+    disaggregated['tour_type_general'] = disaggregated['tour_type'].apply(general_of)
+
+    employee = _share_frame(by_tour[is_emp], tour_types[is_emp], 'tour_type', dimension, categories, 'trip')
+    employee['tour_type_general'] = employee['tour_type'].apply(general_of)
+
+    general_codes, generals = pd.factorize(np.asarray([general_of(t) for t in tours], dtype=object), sort=True)
+    by_general = np.zeros((len(generals), n_categories))
+    np.add.at(by_general, general_codes, tour_totals)
+    general_totals = np.vstack([by_general, total])
+    general = _share_frame(general_totals, list(generals) + ['Total'],
+                           'tour_type_general', dimension, categories, 'trip_by_mode')
+    general.insert(3, 'trip_total', np.repeat(general_totals.sum(axis=1), n_categories))
+
+    return disaggregated, general, employee
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+
+# === Trip summarizer ===
+# Model and survey trips by an aggregator (arrival_mode, origin_pmsa, ...) and tour type; mode_labels
+# maps arrival modes to the chart labels of the selected model (model_plugins)
+def general_tour_type(tour_type):
+    return ('resident' if str(tour_type).startswith('res_') else
+            'visitor' if str(tour_type).startswith('vis_') else
+            'employee' if str(tour_type).startswith('emp') else
+            'Total' if str(tour_type) == 'Total' else
+            tour_type)
+
+def relabel(values, mapping):
+    # categorical model columns are relabelled through their categories instead of row by row
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.replace(mapping)
+    codes, labels = pd.factorize(values.cat.categories.map(lambda c: mapping.get(c, c)), sort=True)
+    new_codes = np.where(values.cat.codes >= 0, codes[values.cat.codes], -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, labels), index=values.index, name=values.name)
+
+def prepare_santrips(trip_data, emp, mode_labels):
+    # ignore employee trips if emp is set to False
+    if emp == False:
+        trip_data = trip_data.query("tour_type != 'emp'").copy()
+    # include ONLY employee trips if emp is set to True
+    else:
+        trip_data = trip_data.query("tour_type == 'emp'").copy()
+
+    trip_data['arrival_mode'] = relabel(trip_data['arrival_mode'], mode_labels)
+
+    # rename columns for clarity
+    return trip_data.rename(columns={'weight_person_trip': 'trip'})
+
+def process_santrips(trip_data, aggregator, emp, mode_labels):
+    trip_data = prepare_santrips(trip_data, emp, mode_labels)
+
+    """
+    Group the trip data by the specified aggregator (e.g., arrival_mode) and tour type
+    """
+    # group by user-input aggregator (e.g., arrival_mode) and tour type and calculate percentage of trips by tour type
+    trip_by_mode = trip_data.groupby([aggregator,'tour_type'], observed=True)['trip'].sum().reset_index()
+    for col in [aggregator, 'tour_type']:
+        # the summary is small: categorical keys of model data go back to plain values
+        if isinstance(trip_by_mode[col].dtype, pd.CategoricalDtype):
+            trip_by_mode[col] = trip_by_mode[col].astype(trip_by_mode[col].cat.categories.dtype)
+    trip_by_mode['trip_pct'] = trip_by_mode['trip'] / trip_by_mode.groupby('tour_type')['trip'].transform('sum') * 100
+
+    # create total row from trip_by_mode and calculate percentage of trips
+    trip_mode_totals = trip_by_mode.groupby(aggregator)['trip'].sum().reset_index()
+    trip_mode_totals['tour_type'] = 'Total'
+    trip_mode_totals['trip_pct'] = trip_mode_totals['trip'] / trip_mode_totals['trip'].sum() * 100
+
+    if emp == False:
+        # concatenate the total row to the trip_by_mode DataFrame
+        trip_by_dTour_aggMode = pd.concat([trip_by_mode, trip_mode_totals], ignore_index=True)
+    else:
+        trip_by_dTour_aggMode = trip_by_mode.copy()
+
+    # create a new column for the general tour type
+    trip_by_dTour_aggMode['tour_type_general'] = trip_by_dTour_aggMode['tour_type'].apply(general_tour_type)
+
+    # Ensure all modes in unique_modes are present in merged_df for each tour_type
+    if aggregator == 'arrival_mode':
+        unique_modes = list(set(mode_labels.values()))
+    else:
+        # e.g. origin_pmsa
+        unique_modes = list(trip_data[aggregator].unique())
+    all_tour_types = trip_by_dTour_aggMode['tour_type'].unique()
+    rows_to_add = []
+
+    for tour_type in all_tour_types:
+        existing_modes = set(trip_by_dTour_aggMode.loc[trip_by_dTour_aggMode['tour_type'] == tour_type, aggregator])
+        missing_modes = set(unique_modes) - existing_modes
+        for mode in missing_modes:
+            # Find the general tour type for this tour_type
+            general_type = trip_by_dTour_aggMode.loc[trip_by_dTour_aggMode['tour_type'] == tour_type, 'tour_type_general'].iloc[0]
+            rows_to_add.append({
+                aggregator: mode,
+                'tour_type': tour_type,
+                'trip': 0.0,
+                'trip_pct': 0.0,
+                'tour_type_general': general_type
+            })
+    trip_by_dTour_aggMode = pd.concat([trip_by_dTour_aggMode, pd.DataFrame(rows_to_add)], ignore_index=True)
+    
+    if emp == False:
+        # calculate total trip by general tour type and by arrival mode
+        trip_by_geTour_aggMode = trip_by_dTour_aggMode.query("tour_type_general != 'Total'").copy()
+        trip_by_geTour_aggMode = trip_by_geTour_aggMode.groupby(['tour_type_general', aggregator])['trip'].sum().reset_index()
+        
+        # calculate trip percentage by general tour type and by arrival mode
+        total_trips_by_geTour = trip_by_geTour_aggMode.groupby(['tour_type_general'])['trip'].sum().reset_index()
+        trip_by_geTour_aggMode = trip_by_geTour_aggMode.merge(total_trips_by_geTour, on='tour_type_general', suffixes=('_by_mode', '_total'))
+        trip_by_geTour_aggMode['trip_pct'] = trip_by_geTour_aggMode['trip_by_mode'] / trip_by_geTour_aggMode['trip_total'] * 100
+
+        # combine trips of all general tour types and calculate overall total
+        trip_geMode_totals = trip_by_dTour_aggMode.query("tour_type == 'Total'").copy()
+        trip_geMode_totals = trip_geMode_totals.rename(columns={'trip': 'trip_by_mode'}).drop(['tour_type'], axis=1)
+        trip_geMode_totals['trip_total'] = trip_geMode_totals['trip_by_mode'].sum()
+        trip_by_geTour_aggMode = pd.concat([trip_by_geTour_aggMode, trip_geMode_totals], ignore_index=True)
+        
+        return trip_by_dTour_aggMode, trip_by_geTour_aggMode
+    else:
+        return trip_by_dTour_aggMode
+
+
+def merge_summarized_trip_data(model, survey, aggregator):
+    return model.merge(survey, on=aggregator, how='right', suffixes=('_model', '_survey'))
+
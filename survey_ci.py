@@ -0,0 +1,113 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from config import CACHE_DIR
+
+
+# === Survey share confidence intervals ===
+# Defaults for the weighted bootstrap; replicates and level can be overridden from .env
+CI_REPLICATES = 1000
+CI_LEVEL = 0.95
+CI_SEED = 20250918
+CI_CHUNK = 250      # replicates drawn per block, bounds memory to CI_CHUNK x n_records
+CI_FORMAT = 2       # bumped when the interval table layout changes, so older cache files are not read
+
+_ci_cache = {}
+
+
+def survey_version(survey_df):
+    """Short content hash of the survey table, used to key cached intervals."""
+    row_hashes = pd.util.hash_pandas_object(survey_df, index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:12]
+
+
+def resample_counts(n_records, n_reps, seed=CI_SEED, chunk=CI_CHUNK):
+    """Yield blocks of bootstrap resample counts with shape (replicates, records)."""
+    rng = np.random.default_rng(seed)
+    pvals = np.full(n_records, 1.0 / n_records)
+    for start in range(0, n_reps, chunk):
+        size = min(chunk, n_reps - start)
+        yield rng.multinomial(n_records, pvals, size=size).astype(np.float64)
+
+
+def bootstrap_share_ci(records, cell_col, group_cols, weight_col='trip',
+                       n_reps=CI_REPLICATES, level=CI_LEVEL, seed=CI_SEED):
+    """
+    Percentile bootstrap interval of each cell's share (%) of its group total.
+
+    Survey records are resampled with replacement; every replicate is a row of resample
+    counts, so the weighted cell totals for all replicates are a single matrix product.
+    Each column in group_cols defines one set of groups (e.g. tour_type, or a constant
+    'Total' column) and all sets are evaluated on the same replicates. Returns one row per
+    (group column, segment, cell) with columns ['level', 'segment', cell_col, 'trip_pct_survey_lo',
+    'trip_pct_survey_hi'], where level is the group column that defined the segment.
+    """
+    columns = ['level', 'segment', cell_col, 'trip_pct_survey_lo', 'trip_pct_survey_hi']
+    if records.empty:
+        return pd.DataFrame(columns=columns)
+
+    n_records = len(records)
+    weights = records[weight_col].to_numpy(dtype=np.float64)
+
+    # record -> (segment, cell) weight matrix and (segment, cell) -> segment codes,
+    # one block of columns per group column
+    blocks, levels, segments, cell_values, group_codes = [], [], [], [], []
+    n_groups = 0
+    for group_col in group_cols:
+        codes, cells = pd.MultiIndex.from_arrays([records[group_col], records[cell_col]]).factorize()
+        block = np.zeros((n_records, len(cells)))
+        block[np.arange(n_records), codes] = weights
+        blocks.append(block)
+
+        segment = cells.get_level_values(0)
+        segment_codes, segment_uniques = pd.factorize(segment)
+        group_codes.append(segment_codes + n_groups)
+        n_groups += len(segment_uniques)
+        levels.extend([group_col] * len(cells))
+        segments.extend(segment)
+        cell_values.extend(cells.get_level_values(1))
+    cell_weights = np.hstack(blocks)
+    group_codes = np.concatenate(group_codes)
+
+    n_cells = cell_weights.shape[1]
+    group_indicator = np.zeros((n_cells, n_groups))
+    group_indicator[np.arange(n_cells), group_codes] = 1.0
+
+    shares = np.empty((n_reps, n_cells))
+    row = 0
+    for counts in resample_counts(n_records, n_reps, seed):
+        cell_totals = counts @ cell_weights
+        group_totals = cell_totals @ group_indicator
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shares[row:row + len(counts)] = cell_totals / group_totals[:, group_codes] * 100
+        row += len(counts)
+
+    tail = (1 - level) / 2 * 100
+    lo, hi = np.nanpercentile(shares, [tail, 100 - tail], axis=0)
+    return pd.DataFrame({
+        'level': levels,
+        'segment': segments,
+        cell_col: cell_values,
+        'trip_pct_survey_lo': lo,
+        'trip_pct_survey_hi': hi,
+    }, columns=columns)
+
+
+def cached_share_ci(version, key, compute, cache_dir=CACHE_DIR):
+    """Return intervals for (survey version, key) from memory or disk, computing them once."""
+    if (version, key) in _ci_cache:
+        return _ci_cache[(version, key)]
+
+    path = Path(cache_dir) / f"survey_ci{CI_FORMAT}_{version}_{key}.parquet"
+    if path.exists():
+        ci = pd.read_parquet(path)
+    else:
+        ci = compute()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            ci.to_parquet(path, index=False)
+        except OSError as e:
+            print(f"⚠️ Could not write survey CI cache {path}: {e}")
+    _ci_cache[(version, key)] = ci
+    return ci